@@ -1,11 +1,28 @@
+import heapq
+import math
+from datetime import datetime, timedelta
 from functools import wraps
-
+from itertools import islice
+
+import click
+from api.archive import COLUMNS as ARCHIVE_COLUMNS
+from api.archive import Archive, read_manifest, write_segment
+from api.auth import (
+    ApiKeyEntry,
+    ApiKeyRegistry,
+    RateLimit,
+    RateLimiter,
+    generate_api_key,
+    hash_api_key,
+)
 from api.config import Config
+from api.profiling import init_profiling
 from dotenv import load_dotenv
-from flask import Flask, abort, current_app, jsonify, request
+from flask import Flask, abort, current_app, g, jsonify, request
+from flask.cli import AppGroup, with_appcontext
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import desc
+from sqlalchemy import and_, desc, false, or_
 from sqlalchemy.exc import IntegrityError
 
 # Load environment variables from .env
@@ -20,6 +37,10 @@ class Transaction(db.Model):
     __tablename__ = "transactions"
 
     id = db.Column(db.Integer, primary_key=True)
+    # EVM chain the deposit was made on; 1 is Ethereum mainnet
+    chain_id = db.Column(
+        db.Integer, nullable=False, default=1, server_default="1", index=True
+    )
     user_address = db.Column(db.String(42), nullable=False, index=True)
     original_asset = db.Column(db.String(10), nullable=False)
     original_amount = db.Column(db.Numeric, nullable=False)
@@ -31,6 +52,7 @@ class Transaction(db.Model):
     def to_dict(self):
         return {
             "id": self.id,
+            "chain_id": self.chain_id,
             "user_address": self.user_address,
             "original_asset": self.original_asset,
             "original_amount": float(self.original_amount),
@@ -41,24 +63,403 @@ class Transaction(db.Model):
         }
 
 
-def token_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        auth_header = request.headers.get("Authorization", None)
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return jsonify({"error": "Authorization header missing or invalid."}), 401
+class MonitorSource(db.Model):
+    """
+    Checkpoint and metrics for one monitored (chain, Safe) pair. Written by
+    the transaction monitor in the same commit as the deposits it ingests.
+    """
+
+    __tablename__ = "monitor_sources"
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(64), unique=True, nullable=False)
+    chain_id = db.Column(db.Integer, nullable=False)
+    safe_address = db.Column(db.String(42), nullable=False)
+    last_block = db.Column(db.BigInteger, nullable=False)
+    head_block = db.Column(db.BigInteger, nullable=True)
+    deposits_total = db.Column(db.BigInteger, nullable=False, default=0)
+    blocks_per_second = db.Column(db.Float, nullable=False, default=0.0)
+    deposits_per_second = db.Column(db.Float, nullable=False, default=0.0)
+    errors_total = db.Column(db.BigInteger, nullable=False, default=0)
+    last_error = db.Column(db.String(255), nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "key": self.key,
+            "chain_id": self.chain_id,
+            "safe_address": self.safe_address,
+            "last_block": self.last_block,
+            "head_block": self.head_block,
+            "lag_blocks": (
+                None
+                if self.head_block is None
+                else max(0, self.head_block - self.last_block)
+            ),
+            "deposits_total": self.deposits_total,
+            "blocks_per_second": self.blocks_per_second,
+            "deposits_per_second": self.deposits_per_second,
+            "errors_total": self.errors_total,
+            "last_error": self.last_error,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+class ApiKey(db.Model):
+    __tablename__ = "api_keys"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(64), unique=True, nullable=False)
+    key_hash = db.Column(db.String(64), unique=True, nullable=False)
+    # Per-key overrides of the RATE_LIMIT_* defaults; NULL means use the default
+    read_rate = db.Column(db.Float, nullable=True)
+    read_burst = db.Column(db.Integer, nullable=True)
+    write_rate = db.Column(db.Float, nullable=True)
+    write_burst = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
+    revoked_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "read_rate": self.read_rate,
+            "read_burst": self.read_burst,
+            "write_rate": self.write_rate,
+            "write_burst": self.write_burst,
+            "created_at": self.created_at.isoformat(),
+            "revoked_at": self.revoked_at.isoformat() if self.revoked_at else None,
+        }
+
+
+# Name of the registry entry for the shared AUTH_TOKEN
+LEGACY_KEY_NAME = "default"
+
+
+def _default_limit(config, kind):
+    return RateLimit(
+        config[f"RATE_LIMIT_{kind.upper()}_RATE"],
+        config[f"RATE_LIMIT_{kind.upper()}_BURST"],
+    )
+
+
+def _load_api_keys():
+    """
+    Load active keys for the registry cache. The legacy shared AUTH_TOKEN is
+    kept as a key named "default" so existing ingesters keep working.
+    """
+    config = current_app.config
+    read_default = _default_limit(config, "read")
+    write_default = _default_limit(config, "write")
+
+    entries = []
+    if config.get("AUTH_TOKEN"):
+        entries.append(
+            ApiKeyEntry(
+                LEGACY_KEY_NAME,
+                hash_api_key(config["AUTH_TOKEN"]),
+                read_default,
+                write_default,
+            )
+        )
+    for key in ApiKey.query.filter(ApiKey.revoked_at.is_(None)):
+        entries.append(
+            ApiKeyEntry(
+                key.name,
+                key.key_hash,
+                RateLimit(
+                    read_default.rate if key.read_rate is None else key.read_rate,
+                    read_default.burst if key.read_burst is None else key.read_burst,
+                ),
+                RateLimit(
+                    write_default.rate if key.write_rate is None else key.write_rate,
+                    write_default.burst if key.write_burst is None else key.write_burst,
+                ),
+            )
+        )
+    return entries
+
+
+# Upper bound for Retry-After; a bucket with a refill rate of 0 never refills
+MAX_RETRY_AFTER = 3600
+
+
+def _too_many_requests(retry_after):
+    response = jsonify({"error": "Rate limit exceeded."})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(
+        max(1, math.ceil(min(retry_after, MAX_RETRY_AFTER)))
+    )
+    return response
+
+
+def _bearer_token():
+    auth_header = request.headers.get("Authorization", None)
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None
+    return auth_header.split(" ")[1]
+
+
+def _key_required(kind):
+    """
+    Require a valid API key and charge the request to that key's `kind`
+    ("read" or "write") bucket.
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            token = _bearer_token()
+            if token is None:
+                return (
+                    jsonify({"error": "Authorization header missing or invalid."}),
+                    401,
+                )
+
+            # Check if token is valid
+            api_key = current_app.extensions["api_keys"].verify(token)
+            if api_key is None:
+                return jsonify({"error": "Invalid token."}), 403
+            g.api_key = api_key
 
-        token = auth_header.split(" ")[1]
+            retry_after = current_app.extensions["rate_limiter"].hit(
+                api_key.key_hash, kind, getattr(api_key, kind)
+            )
+            if retry_after:
+                return _too_many_requests(retry_after)
+
+            return f(*args, **kwargs)
+
+        return decorated_function
+
+    return decorator
+
+
+# Authenticated endpoints that change data use the key's write bucket,
+# authenticated read-only endpoints its read bucket
+token_required = _key_required("write")
+read_token_required = _key_required("read")
 
-        # Check if token is valid
-        if token != current_app.config["AUTH_TOKEN"]:
-            return jsonify({"error": "Invalid token."}), 403
+
+def read_rate_limited(f):
+    """
+    Apply the read limit. Requests with a valid key use that key's bucket;
+    anything else is limited per client address by RATE_LIMIT_ANON_*, which
+    is off unless configured.
+    """
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        token = _bearer_token()
+        api_key = current_app.extensions["api_keys"].verify(token) if token else None
+        if api_key is not None:
+            g.api_key = api_key
+            identity, limit = api_key.key_hash, api_key.read
+        else:
+            identity = f"addr:{request.remote_addr}"
+            limit = _default_limit(current_app.config, "anon")
+
+        retry_after = current_app.extensions["rate_limiter"].hit(
+            identity, "read", limit
+        )
+        if retry_after:
+            return _too_many_requests(retry_after)
 
         return f(*args, **kwargs)
 
     return decorated_function
 
 
+api_keys_cli = AppGroup("api-keys", help="Manage API keys.")
+
+
+@api_keys_cli.command("create")
+@click.argument("name")
+@click.option("--read-rate", type=click.FloatRange(min=0), default=None)
+@click.option("--read-burst", type=click.IntRange(min=0), default=None)
+@click.option("--write-rate", type=click.FloatRange(min=0), default=None)
+@click.option("--write-burst", type=click.IntRange(min=0), default=None)
+def create_api_key(name, read_rate, read_burst, write_rate, write_burst):
+    """Create a key and print it once; only its hash is stored."""
+    if name == LEGACY_KEY_NAME:
+        raise click.ClickException(
+            f"{name!r} is reserved for the shared AUTH_TOKEN key."
+        )
+    raw_key = generate_api_key()
+    db.session.add(
+        ApiKey(
+            name=name,
+            key_hash=hash_api_key(raw_key),
+            read_rate=read_rate,
+            read_burst=read_burst,
+            write_rate=write_rate,
+            write_burst=write_burst,
+        )
+    )
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        raise click.ClickException(f"API key {name!r} already exists.")
+    current_app.extensions["api_keys"].invalidate()
+    click.echo(raw_key)
+
+
+@api_keys_cli.command("revoke")
+@click.argument("name")
+def revoke_api_key(name):
+    """Revoke a key. Other processes drop it within API_KEY_CACHE_TTL."""
+    key = ApiKey.query.filter_by(name=name, revoked_at=None).first()
+    if key is None:
+        raise click.ClickException(f"No active API key named {name!r}.")
+    key.revoked_at = db.func.now()
+    db.session.commit()
+    current_app.extensions["api_keys"].invalidate()
+    click.echo(f"Revoked {name}.")
+
+
+@api_keys_cli.command("list")
+def list_api_keys():
+    """List keys without their secrets."""
+    for key in ApiKey.query.order_by(ApiKey.id):
+        status = "revoked" if key.revoked_at else "active"
+        click.echo(f"{key.name}\t{status}\t{key.created_at.isoformat()}")
+
+
+def _paginate_with_archive(query, page, per_page, archived, archived_total):
+    """
+    Page through table rows and archived rows together, newest first.
+    `archived` holds at least the page * per_page newest archived rows, newest
+    first; `archived_total` counts all of them.
+    """
+    if not archived_total:
+        pagination = query.order_by(desc(Transaction.timestamp)).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        return (
+            [tx.to_dict() for tx in pagination.items],
+            pagination.total,
+            pagination.pages,
+        )
+
+    start = (page - 1) * per_page
+    table_total = query.order_by(None).count()
+    table_rows = [
+        tx.to_dict()
+        for tx in query.order_by(desc(Transaction.timestamp)).limit(start + per_page)
+    ]
+    merged = heapq.merge(
+        table_rows, archived, key=lambda row: row["timestamp"], reverse=True
+    )
+    total = table_total + archived_total
+    return (
+        list(islice(merged, start, start + per_page)),
+        total,
+        math.ceil(total / per_page),
+    )
+
+
+# Rows deleted per statement; keeps IN lists under SQLite's parameter limit
+ARCHIVE_DELETE_CHUNK = 500
+
+
+def _delete_archived(keys):
+    """
+    Delete table rows matching archived (id, transaction_hash) pairs. Matching
+    on both guards against ids that SQLite reuses after deletion.
+    """
+    for start in range(0, len(keys), ARCHIVE_DELETE_CHUNK):
+        chunk = dict(keys[start : start + ARCHIVE_DELETE_CHUNK])
+        stored = Transaction.query.with_entities(
+            Transaction.id, Transaction.transaction_hash
+        ).filter(Transaction.id.in_(list(chunk)))
+        ids = [id_ for id_, tx_hash in stored if chunk[id_] == tx_hash]
+        if ids:
+            Transaction.query.filter(Transaction.id.in_(ids)).delete(
+                synchronize_session=False
+            )
+    db.session.commit()
+
+
+def _archivable(cutoff):
+    """
+    Filter for rows older than `cutoff` whose lock has also expired, so
+    positions that are still locked stay in the table. Built per lock
+    duration to avoid database-specific date arithmetic.
+    """
+    now = datetime.utcnow()
+    durations = [
+        weeks
+        for (weeks,) in db.session.query(Transaction.lock_duration_weeks).distinct()
+        # Locks reaching back past datetime.min never expire
+        if weeks * 7 < (now - datetime.min).days
+    ]
+    return or_(
+        false(),
+        *[
+            and_(
+                Transaction.lock_duration_weeks == weeks,
+                Transaction.timestamp < min(cutoff, now - timedelta(weeks=weeks)),
+            )
+            for weeks in durations
+        ],
+    )
+
+
+def archive_transactions(cutoff, directory, segment_rows):
+    """
+    Move transactions older than `cutoff` whose lock has expired into archive
+    segments of at most `segment_rows` rows. Each segment is written and registered in the
+    manifest before its rows are deleted. If a run stops between the two,
+    the next run first finishes deleting the newest segment's rows, so no
+    row is ever archived twice. Returns the number of rows archived.
+    """
+    segments = read_manifest(directory)["segments"]
+    if segments:
+        _delete_archived(Archive(directory).segment_keys(segments[-1]["name"]))
+
+    columns = [getattr(Transaction, name) for name, _ in ARCHIVE_COLUMNS]
+    archivable = _archivable(cutoff)
+    archived = 0
+    while True:
+        rows = (
+            Transaction.query.with_entities(*columns)
+            .filter(archivable)
+            .order_by(Transaction.id)
+            .limit(segment_rows)
+            .all()
+        )
+        if not rows:
+            break
+        rows = [row._asdict() for row in rows]
+        write_segment(directory, rows)
+        _delete_archived([(row["id"], row["transaction_hash"]) for row in rows])
+        archived += len(rows)
+    return archived
+
+
+@click.command("archive-transactions")
+@click.option(
+    "--older-than-days",
+    type=int,
+    default=None,
+    help="Archive rows older than this (default: ARCHIVE_AFTER_DAYS).",
+)
+@with_appcontext
+def archive_transactions_command(older_than_days):
+    """Move old transactions from the database into cold storage."""
+    config = current_app.config
+    if not config["ARCHIVE_DIR"]:
+        raise click.ClickException("ARCHIVE_DIR is not configured.")
+    if older_than_days is None:
+        older_than_days = config["ARCHIVE_AFTER_DAYS"]
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    archived = archive_transactions(
+        cutoff, config["ARCHIVE_DIR"], config["ARCHIVE_SEGMENT_ROWS"]
+    )
+    click.echo(f"Archived {archived} transactions older than {cutoff.isoformat()}.")
+
+
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
@@ -66,6 +467,16 @@ def create_app(config_class=Config):
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
+    app.extensions["api_keys"] = ApiKeyRegistry(
+        _load_api_keys, ttl=app.config["API_KEY_CACHE_TTL"]
+    )
+    app.extensions["rate_limiter"] = RateLimiter()
+    app.cli.add_command(api_keys_cli)
+    app.cli.add_command(archive_transactions_command)
+    # Read-only view of archived transactions, consulted when the table misses
+    archive = Archive(app.config["ARCHIVE_DIR"]) if app.config["ARCHIVE_DIR"] else None
+    app.extensions["archive"] = archive
+    init_profiling(app)
 
     # Register routes
     @app.route("/api/transactions", methods=["POST"])
@@ -80,8 +491,10 @@ def create_app(config_class=Config):
             "original_amount": 1.5,
             "usdc_amount": 3000,
             "lock_duration_weeks": 12,
-            "transaction_hash": "0xTransactionHash"
+            "transaction_hash": "0xTransactionHash",
+            "chain_id": 1
         }
+        chain_id is optional and defaults to 1 (Ethereum mainnet).
         """
         data = request.get_json()
         if not data:
@@ -112,6 +525,7 @@ def create_app(config_class=Config):
         usdc_amount = data.get("usdc_amount")
         lock_duration_weeks = data.get("lock_duration_weeks")
         transaction_hash = data.get("transaction_hash")
+        chain_id = data.get("chain_id", 1)
 
         # Validate user_address format (basic check)
         if (
@@ -160,8 +574,17 @@ def create_app(config_class=Config):
         ):
             return jsonify({"error": "Invalid transaction_hash format."}), 400
 
+        # Validate chain_id (optional, defaults to Ethereum mainnet)
+        if not isinstance(chain_id, int) or isinstance(chain_id, bool) or chain_id <= 0:
+            return jsonify({"error": "chain_id must be a positive integer."}), 400
+
+        # Archived transactions are no longer covered by the unique constraint
+        if archive is not None and transaction_hash in archive:
+            return jsonify({"error": "Transaction with this hash already exists."}), 409
+
         # Create Transaction object
         transaction = Transaction(
+            chain_id=chain_id,
             user_address=user_address,
             original_asset=original_asset,
             original_amount=original_amount,
@@ -185,6 +608,7 @@ def create_app(config_class=Config):
             )
 
     @app.route("/api/users/<string:user_address>/transactions", methods=["GET"])
+    @read_rate_limited
     def get_user_transactions(user_address):
         """
         Retrieve all transactions for a specific user.
@@ -208,27 +632,35 @@ def create_app(config_class=Config):
                 400,
             )
 
-        # Query transactions
-        transactions_query = Transaction.query.filter_by(
-            user_address=user_address
-        ).order_by(desc(Transaction.timestamp))
-        pagination = transactions_query.paginate(
-            page=page, per_page=per_page, error_out=False
+        # Query transactions, including archived ones
+        archived = []
+        if archive is not None:
+            archived = sorted(
+                archive.iter_transactions(user_address=user_address),
+                key=lambda row: row["timestamp"],
+                reverse=True,
+            )
+        transactions, total, pages = _paginate_with_archive(
+            Transaction.query.filter_by(user_address=user_address),
+            page,
+            per_page,
+            archived,
+            len(archived),
         )
-        transactions = [tx.to_dict() for tx in pagination.items]
 
         response = {
             "user_address": user_address,
             "page": page,
             "per_page": per_page,
-            "total_transactions": pagination.total,
-            "total_pages": pagination.pages,
+            "total_transactions": total,
+            "total_pages": pages,
             "transactions": transactions,
         }
 
         return jsonify(response), 200
 
     @app.route("/api/transactions/<string:tx_hash>", methods=["GET"])
+    @read_rate_limited
     def get_transaction(tx_hash):
         """
         Retrieve a specific transaction by its hash.
@@ -238,12 +670,17 @@ def create_app(config_class=Config):
             return jsonify({"error": "Invalid transaction_hash format."}), 400
 
         transaction = Transaction.query.filter_by(transaction_hash=tx_hash).first()
-        if not transaction:
+        if transaction:
+            return jsonify(transaction.to_dict()), 200
+
+        archived = archive.get(tx_hash) if archive is not None else None
+        if archived is None:
             return jsonify({"error": "Transaction not found."}), 404
 
-        return jsonify(transaction.to_dict()), 200
+        return jsonify(archived), 200
 
     @app.route("/api/transactions", methods=["GET"])
+    @read_rate_limited
     def get_all_transactions():
         """
         Retrieve all transactions.
@@ -263,22 +700,72 @@ def create_app(config_class=Config):
                 400,
             )
 
-        transactions_query = Transaction.query.order_by(desc(Transaction.timestamp))
-        pagination = transactions_query.paginate(
-            page=page, per_page=per_page, error_out=False
+        archived_total = archive.count() if archive is not None else 0
+        archived = archive.latest(page * per_page) if archived_total else []
+        transactions, total, pages = _paginate_with_archive(
+            Transaction.query, page, per_page, archived, archived_total
         )
-        transactions = [tx.to_dict() for tx in pagination.items]
 
         response = {
             "page": page,
             "per_page": per_page,
-            "total_transactions": pagination.total,
-            "total_pages": pagination.pages,
+            "total_transactions": total,
+            "total_pages": pages,
             "transactions": transactions,
         }
 
         return jsonify(response), 200
 
+    @app.route("/api/monitor/sources", methods=["GET"])
+    @read_token_required
+    def get_monitor_sources():
+        """
+        Retrieve checkpoint, lag and throughput for each monitored source.
+        """
+        sources = MonitorSource.query.order_by(MonitorSource.key).all()
+        return jsonify({"sources": [source.to_dict() for source in sources]}), 200
+
+    @app.route("/api/profiles", methods=["GET"])
+    @read_token_required
+    def list_profiles():
+        """
+        List saved request profiles, newest first, without their details.
+        """
+        store = app.extensions["profiles"]
+        profiles = []
+        for report_id in store.ids():
+            report = store.load(report_id)
+            if report is None:
+                continue
+            profiles.append(
+                {
+                    key: report[key]
+                    for key in (
+                        "id",
+                        "method",
+                        "path",
+                        "status",
+                        "started_at",
+                        "duration_ms",
+                        "query_count",
+                        "query_ms",
+                    )
+                }
+            )
+        return jsonify({"profiles": profiles}), 200
+
+    @app.route("/api/profiles/<string:profile_id>", methods=["GET"])
+    @read_token_required
+    def get_profile(profile_id):
+        """
+        Retrieve a saved request profile with its SQL and call statistics.
+        """
+        report = app.extensions["profiles"].load(profile_id)
+        if report is None:
+            return jsonify({"error": "Profile not found."}), 404
+
+        return jsonify(report), 200
+
     # Error Handlers
     @app.errorhandler(404)
     def not_found(error):
@@ -0,0 +1,468 @@
+import bisect
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Cold storage for archived transactions.
+#
+# An archive directory holds immutable segments plus a manifest:
+#
+#   manifest.json      segment list with row count, id, hash and time ranges
+#   seg-000001.seg     zlib-compressed columns, one blob per column
+#   seg-000001.idx     sorted (transaction_hash, row) records, read via mmap
+#   seg-000001.bloom   bloom filter over the segment's hashes, read via mmap
+#
+# Segment layout: SEGMENT_MAGIC, uint32 header length, JSON header, then the
+# column blobs at the offsets listed in the header. Index layout: INDEX_MAGIC
+# followed by fixed-width records of HASH_WIDTH ascii bytes and a uint32 row.
+# Bloom layout: BLOOM_MAGIC followed by the bit array; its size and number of
+# probes are recorded in the manifest entry.
+
+SEGMENT_MAGIC = b"BLBSEG1\n"
+INDEX_MAGIC = b"BLBIDX1\n"
+MANIFEST_NAME = "manifest.json"
+HASH_WIDTH = 66
+INDEX_RECORD = struct.Struct(f"<{HASH_WIDTH}sI")
+BLOOM_MAGIC = b"BLBBLM1\n"
+# About 1% false positives, so a miss touches almost no segment indexes
+BLOOM_BITS_PER_ROW = 10
+BLOOM_PROBES = 7
+
+EPOCH = datetime(1970, 1, 1)
+
+# Column name -> encoding. Amounts are kept as decimal strings so archiving
+# never loses precision from the Numeric columns.
+COLUMNS = (
+    ("id", "int64"),
+    ("chain_id", "int64"),
+    ("user_address", "str"),
+    ("original_asset", "str"),
+    ("original_amount", "decimal"),
+    ("usdc_amount", "decimal"),
+    ("lock_duration_weeks", "int64"),
+    ("transaction_hash", "str"),
+    ("timestamp", "datetime"),
+)
+
+
+def _to_micros(value):
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value):
+    return EPOCH + timedelta(microseconds=value)
+
+
+def _encode_column(kind, values):
+    if kind == "int64":
+        raw = struct.pack(f"<{len(values)}q", *values)
+    elif kind == "datetime":
+        raw = struct.pack(f"<{len(values)}q", *(_to_micros(v) for v in values))
+    else:
+        encoded = [str(v).encode("utf-8") for v in values]
+        raw = struct.pack(f"<{len(encoded)}I", *(len(v) for v in encoded))
+        raw += b"".join(encoded)
+    return zlib.compress(raw, 6)
+
+
+def _decode_column(kind, blob, rows):
+    raw = zlib.decompress(blob)
+    if kind in ("int64", "datetime"):
+        values = struct.unpack(f"<{rows}q", raw)
+        if kind == "datetime":
+            return [_from_micros(v) for v in values]
+        return list(values)
+
+    lengths = struct.unpack_from(f"<{rows}I", raw)
+    offset = 4 * rows
+    values = []
+    for length in lengths:
+        values.append(raw[offset : offset + length].decode("utf-8"))
+        offset += length
+    if kind == "decimal":
+        return [Decimal(v) for v in values]
+    return values
+
+
+def _row_to_dict(columns, row):
+    # Same shape as Transaction.to_dict()
+    chain_ids = columns.get("chain_id")
+    return {
+        "id": columns["id"][row],
+        # Segments written before chain_id existed only hold mainnet deposits
+        "chain_id": chain_ids[row] if chain_ids is not None else 1,
+        "user_address": columns["user_address"][row],
+        "original_asset": columns["original_asset"][row],
+        "original_amount": float(columns["original_amount"][row]),
+        "usdc_amount": float(columns["usdc_amount"][row]),
+        "lock_duration_weeks": columns["lock_duration_weeks"][row],
+        "transaction_hash": columns["transaction_hash"][row],
+        "timestamp": columns["timestamp"][row].isoformat(),
+    }
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _bloom_hashes(tx_hash):
+    digest = hashlib.blake2b(tx_hash.encode("utf-8"), digest_size=16).digest()
+    # Double hashing: probe i is (h1 + i * h2) mod bits; odd h2 avoids cycles
+    return (
+        int.from_bytes(digest[:8], "little"),
+        int.from_bytes(digest[8:], "little") | 1,
+    )
+
+
+def _bloom_positions(hashes, bits, probes):
+    h1, h2 = hashes
+    return [(h1 + i * h2) % bits for i in range(probes)]
+
+
+def read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"version": 1, "segments": []}
+
+
+def write_segment(directory, rows):
+    """
+    Write `rows` (dicts with the COLUMNS keys) as a new immutable segment and
+    register it in the manifest. Returns the manifest entry.
+
+    The segment and index are fully written before the manifest is replaced,
+    so readers never see a partial segment. Only one writer may run at a time.
+    """
+    if not rows:
+        raise ValueError("Cannot write an empty segment.")
+    os.makedirs(directory, exist_ok=True)
+    manifest = read_manifest(directory)
+    number = max((s["number"] for s in manifest["segments"]), default=0) + 1
+    name = f"seg-{number:06d}"
+
+    header = {"rows": len(rows), "columns": {}}
+    blobs = []
+    offset = 0
+    for column, kind in COLUMNS:
+        blob = _encode_column(kind, [row[column] for row in rows])
+        header["columns"][column] = {
+            "type": kind,
+            "offset": offset,
+            "length": len(blob),
+        }
+        blobs.append(blob)
+        offset += len(blob)
+    header_bytes = json.dumps(header).encode("utf-8")
+    segment_path = os.path.join(directory, name + ".seg")
+    _write_atomic(
+        segment_path,
+        SEGMENT_MAGIC
+        + struct.pack("<I", len(header_bytes))
+        + header_bytes
+        + b"".join(blobs),
+    )
+
+    records = sorted(
+        (row["transaction_hash"].encode("ascii"), i) for i, row in enumerate(rows)
+    )
+    index_path = os.path.join(directory, name + ".idx")
+    _write_atomic(
+        index_path,
+        INDEX_MAGIC + b"".join(INDEX_RECORD.pack(h, i) for h, i in records),
+    )
+
+    hashes = [row["transaction_hash"] for row in rows]
+    bloom_bits = max(64, len(rows) * BLOOM_BITS_PER_ROW)
+    bloom = bytearray((bloom_bits + 7) // 8)
+    for tx_hash in hashes:
+        for position in _bloom_positions(
+            _bloom_hashes(tx_hash), bloom_bits, BLOOM_PROBES
+        ):
+            bloom[position >> 3] |= 1 << (position & 7)
+    _write_atomic(os.path.join(directory, name + ".bloom"), BLOOM_MAGIC + bloom)
+
+    timestamps = [row["timestamp"] for row in rows]
+    ids = [row["id"] for row in rows]
+    entry = {
+        "number": number,
+        "name": name,
+        "rows": len(rows),
+        "min_id": min(ids),
+        "max_id": max(ids),
+        "min_hash": min(hashes),
+        "max_hash": max(hashes),
+        "min_timestamp": min(timestamps).isoformat(),
+        "max_timestamp": max(timestamps).isoformat(),
+        "bloom_bits": bloom_bits,
+        "bloom_probes": BLOOM_PROBES,
+        "segment_sha256": _file_sha256(segment_path),
+        "index_sha256": _file_sha256(index_path),
+    }
+    manifest["segments"].append(entry)
+    _write_atomic(
+        os.path.join(directory, MANIFEST_NAME),
+        json.dumps(manifest, indent=2).encode("utf-8"),
+    )
+    return entry
+
+
+class _Index:
+    """
+    Memory-mapped view of a segment index with binary search by hash.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[: len(INDEX_MAGIC)] != INDEX_MAGIC:
+            raise ValueError(f"{path} is not a segment index.")
+        self._count = (len(self._mmap) - len(INDEX_MAGIC)) // INDEX_RECORD.size
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        start = len(INDEX_MAGIC) + i * INDEX_RECORD.size
+        return self._mmap[start : start + HASH_WIDTH]
+
+    def lookup(self, tx_hash):
+        key = tx_hash.encode("ascii").ljust(HASH_WIDTH, b"\0")
+        i = bisect.bisect_left(self, key)
+        if i < self._count and self[i] == key:
+            start = len(INDEX_MAGIC) + i * INDEX_RECORD.size
+            return INDEX_RECORD.unpack_from(self._mmap, start)[1]
+        return None
+
+
+class _Bloom:
+    """
+    Memory-mapped bloom filter over one segment's transaction hashes.
+    """
+
+    def __init__(self, path, bits, probes):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[: len(BLOOM_MAGIC)] != BLOOM_MAGIC:
+            raise ValueError(f"{path} is not a bloom filter.")
+        self.bits = bits
+        self.probes = probes
+
+    def might_contain(self, hashes):
+        offset = len(BLOOM_MAGIC)
+        for position in _bloom_positions(hashes, self.bits, self.probes):
+            if not self._mmap[offset + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class Archive:
+    """
+    Read-only access to an archive directory.
+
+    The manifest is reloaded whenever its mtime changes, so segments written
+    by the archival job become visible without restarting the API. Indexes
+    stay memory-mapped; decoded segments are kept in a small LRU cache.
+    """
+
+    def __init__(self, directory, cache_segments=4):
+        self.directory = directory
+        self.cache_segments = cache_segments
+        self._manifest_mtime = None
+        self._segments = []
+        self._indexes = {}
+        self._blooms = {}
+        self._decoded = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def segments(self):
+        self._refresh()
+        return self._segments
+
+    def _refresh(self):
+        try:
+            mtime = os.stat(os.path.join(self.directory, MANIFEST_NAME)).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._manifest_mtime:
+            return
+        with self._lock:
+            self._segments = read_manifest(self.directory)["segments"]
+            self._manifest_mtime = mtime
+
+    def _index(self, name):
+        index = self._indexes.get(name)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(name)
+                if index is None:
+                    index = _Index(os.path.join(self.directory, name + ".idx"))
+                    self._indexes[name] = index
+        return index
+
+    def _bloom(self, segment):
+        name = segment["name"]
+        bloom = self._blooms.get(name)
+        if bloom is None:
+            with self._lock:
+                bloom = self._blooms.get(name)
+                if bloom is None:
+                    bloom = _Bloom(
+                        os.path.join(self.directory, name + ".bloom"),
+                        segment["bloom_bits"],
+                        segment["bloom_probes"],
+                    )
+                    self._blooms[name] = bloom
+        return bloom
+
+    def _columns(self, name):
+        with self._lock:
+            columns = self._decoded.get(name)
+            if columns is not None:
+                self._decoded.move_to_end(name)
+                return columns
+
+        with open(os.path.join(self.directory, name + ".seg"), "rb") as f:
+            data = f.read()
+        if not data.startswith(SEGMENT_MAGIC):
+            raise ValueError(f"{name} is not an archive segment.")
+        (header_length,) = struct.unpack_from("<I", data, len(SEGMENT_MAGIC))
+        body = len(SEGMENT_MAGIC) + 4 + header_length
+        header = json.loads(data[len(SEGMENT_MAGIC) + 4 : body])
+        columns = {}
+        for column, info in header["columns"].items():
+            start = body + info["offset"]
+            columns[column] = _decode_column(
+                info["type"], data[start : start + info["length"]], header["rows"]
+            )
+
+        with self._lock:
+            self._decoded[name] = columns
+            while len(self._decoded) > self.cache_segments:
+                self._decoded.popitem(last=False)
+        return columns
+
+    def get(self, tx_hash):
+        """
+        Return the archived transaction with this hash as a dict, or None.
+        """
+        row = self._find(tx_hash)
+        if row is None:
+            return None
+        name, i = row
+        return _row_to_dict(self._columns(name), i)
+
+    def __contains__(self, tx_hash):
+        return self._find(tx_hash) is not None
+
+    def _find(self, tx_hash):
+        if len(tx_hash) > HASH_WIDTH or not tx_hash.isascii():
+            return None
+        # Transaction hashes are uniformly random, so every segment's hash
+        # range covers nearly the whole key space; the bloom filters are what
+        # keep a miss from binary-searching every index. Segments written
+        # before bloom filters existed are always searched.
+        hashes = _bloom_hashes(tx_hash)
+        for segment in reversed(self.segments):
+            if "bloom_bits" in segment and not self._bloom(segment).might_contain(
+                hashes
+            ):
+                continue
+            i = self._index(segment["name"]).lookup(tx_hash)
+            if i is not None:
+                return segment["name"], i
+        return None
+
+    def segment_keys(self, name):
+        """
+        Return the (id, transaction_hash) pairs stored in one segment.
+        """
+        columns = self._columns(name)
+        return list(zip(columns["id"], columns["transaction_hash"]))
+
+    def iter_transactions(self, user_address=None, start=None, end=None):
+        """
+        Yield archived transactions as dicts in archive order, optionally
+        filtered by user and by timestamp (start inclusive, end exclusive).
+        Segments outside the time range are skipped without being read.
+        """
+        for segment in self.segments:
+            if (
+                end is not None
+                and datetime.fromisoformat(segment["min_timestamp"]) >= end
+            ):
+                continue
+            if (
+                start is not None
+                and datetime.fromisoformat(segment["max_timestamp"]) < start
+            ):
+                continue
+            columns = self._columns(segment["name"])
+            for i in range(segment["rows"]):
+                if (
+                    user_address is not None
+                    and columns["user_address"][i] != user_address
+                ):
+                    continue
+                timestamp = columns["timestamp"][i]
+                if start is not None and timestamp < start:
+                    continue
+                if end is not None and timestamp >= end:
+                    continue
+                yield _row_to_dict(columns, i)
+
+    def count(self):
+        """
+        Return the number of archived transactions.
+        """
+        return sum(segment["rows"] for segment in self.segments)
+
+    def latest(self, limit):
+        """
+        Return the `limit` newest archived transactions as dicts, newest
+        first. Segments that cannot hold any of them are not read.
+        """
+        newest = []
+        segments = sorted(
+            self.segments, key=lambda segment: segment["max_timestamp"], reverse=True
+        )
+        for segment in segments:
+            if (
+                len(newest) >= limit
+                and datetime.fromisoformat(segment["max_timestamp"]) < newest[0][0]
+            ):
+                break
+            columns = self._columns(segment["name"])
+            for i, timestamp in enumerate(columns["timestamp"]):
+                entry = (timestamp, columns["id"][i], segment["name"], i)
+                if len(newest) < limit:
+                    heapq.heappush(newest, entry)
+                elif entry > newest[0]:
+                    heapq.heapreplace(newest, entry)
+        return [
+            _row_to_dict(self._columns(name), i)
+            for _, _, name, i in sorted(newest, reverse=True)
+        ]
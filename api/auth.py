@@ -0,0 +1,150 @@
+import hashlib
+import hmac
+import math
+import secrets
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+# Limits for a single bucket: `rate` tokens refill per second, up to `burst`.
+RateLimit = namedtuple("RateLimit", ["rate", "burst"])
+
+# A verified key as seen by request handlers.
+ApiKeyEntry = namedtuple("ApiKeyEntry", ["name", "key_hash", "read", "write"])
+
+
+def generate_api_key():
+    """
+    Return a new random API key. Only its hash is ever stored.
+    """
+    return "blb_" + secrets.token_urlsafe(32)
+
+
+def hash_api_key(raw_key):
+    """
+    Hash a raw API key for storage and lookup.
+
+    Keys are 256-bit random tokens, so a single SHA-256 is enough; a slow KDF
+    would only add latency to every authenticated request.
+    """
+    return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated", "lock")
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, now=None):
+        """
+        Take one token. Returns 0 on success, otherwise the number of seconds
+        until a token becomes available.
+        """
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            elapsed = now - self.updated
+            if elapsed > 0:
+                self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+                self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            if self.rate <= 0:
+                return math.inf
+            return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    In-process store of token buckets keyed by (identity, kind).
+
+    The store is an LRU capped at `max_buckets` so anonymous clients keyed by
+    IP address cannot grow it without bound. Limits are per process; with
+    several workers the effective limit is multiplied by the worker count.
+    """
+
+    def __init__(self, max_buckets=10000):
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, identity, kind, limit):
+        """
+        Record one request. Returns 0 if allowed, else seconds to wait.
+        A limit with a non-positive burst disables limiting.
+        """
+        if limit is None or limit.burst <= 0:
+            return 0
+        key = (identity, kind)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if (
+                bucket is None
+                or bucket.rate != limit.rate
+                or bucket.burst != limit.burst
+            ):
+                bucket = TokenBucket(limit.rate, limit.burst)
+                self._buckets[key] = bucket
+            else:
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        return bucket.consume()
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class ApiKeyRegistry:
+    """
+    In-memory cache of active API keys, keyed by key hash.
+
+    `loader` returns an iterable of ApiKeyEntry and is called at most once per
+    `ttl` seconds, so verifying a key normally costs one SHA-256 and a dict
+    lookup with no database round trip. Call `invalidate()` after creating or
+    revoking keys to pick up the change immediately in this process.
+    """
+
+    def __init__(self, loader, ttl=60):
+        self.loader = loader
+        self.ttl = ttl
+        self._entries = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._entries = None
+
+    def _get_entries(self):
+        entries = self._entries
+        if entries is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return entries
+        with self._lock:
+            if self._entries is None or time.monotonic() - self._loaded_at >= self.ttl:
+                self._entries = {entry.key_hash: entry for entry in self.loader()}
+                self._loaded_at = time.monotonic()
+            return self._entries
+
+    def verify(self, raw_key):
+        """
+        Return the ApiKeyEntry for `raw_key`, or None if it is not active.
+        """
+        key_hash = hash_api_key(raw_key)
+        # The lookup is keyed by the digest, so its timing reveals nothing
+        # useful about the raw key; the final comparison is constant-time.
+        entry = self._get_entries().get(key_hash)
+        if entry is None or not hmac.compare_digest(entry.key_hash, key_hash):
+            return None
+        return entry
@@ -9,6 +9,42 @@ class Config:
     TESTING = False
     DEBUG = False
     AUTH_TOKEN = os.getenv("AUTH_TOKEN", "mysecrettoken")
+    # Seconds the in-memory API key cache is trusted before reloading
+    API_KEY_CACHE_TTL = int(os.getenv("API_KEY_CACHE_TTL", 60))
+    # Default per-key token buckets (requests per second, burst size).
+    # A burst of 0 disables the limit.
+    RATE_LIMIT_READ_RATE = float(os.getenv("RATE_LIMIT_READ_RATE", 20))
+    RATE_LIMIT_READ_BURST = int(os.getenv("RATE_LIMIT_READ_BURST", 100))
+    RATE_LIMIT_WRITE_RATE = float(os.getenv("RATE_LIMIT_WRITE_RATE", 5))
+    RATE_LIMIT_WRITE_BURST = int(os.getenv("RATE_LIMIT_WRITE_BURST", 50))
+    # Reads without a valid key, limited per client address. Off by default:
+    # behind a proxy every client shares the proxy's address.
+    RATE_LIMIT_ANON_RATE = float(os.getenv("RATE_LIMIT_ANON_RATE", 20))
+    RATE_LIMIT_ANON_BURST = int(os.getenv("RATE_LIMIT_ANON_BURST", 0))
+    # Cold storage for old transactions; set ARCHIVE_DIR empty to disable
+    ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+    ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 180))
+    ARCHIVE_SEGMENT_ROWS = int(os.getenv("ARCHIVE_SEGMENT_ROWS", 100000))
+    # Request profiling. When enabled, requests slower than PROFILE_SLOW_MS are
+    # saved with their SQL timings (and cProfile output if PROFILE_CALLS is
+    # set). Requests with "X-Profile: 1" and an API key named in PROFILE_KEYS
+    # (comma-separated) are always saved.
+    PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "false").lower() == "true"
+    PROFILE_CALLS = os.getenv("PROFILE_CALLS", "false").lower() == "true"
+    PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", 500))
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_MAX_REPORTS = int(os.getenv("PROFILE_MAX_REPORTS", 100))
+    PROFILE_KEYS = [
+        name.strip()
+        for name in os.getenv("PROFILE_KEYS", "").split(",")
+        if name.strip()
+    ]
+    # Transaction monitor: JSON file listing the chains and Safes to watch,
+    # and how the shared writer batches their deposits
+    MONITOR_SOURCES = os.getenv("MONITOR_SOURCES", "monitor_sources.json")
+    MONITOR_BATCH_SIZE = int(os.getenv("MONITOR_BATCH_SIZE", 500))
+    MONITOR_FLUSH_INTERVAL = float(os.getenv("MONITOR_FLUSH_INTERVAL", 1.0))
+    MONITOR_POLL_INTERVAL = float(os.getenv("MONITOR_POLL_INTERVAL", 5.0))
 
 
 class TestConfig(Config):
@@ -16,3 +52,4 @@ class TestConfig(Config):
     TESTING = True
     DEBUG = True
     AUTH_TOKEN = os.getenv("TEST_AUTH_TOKEN", "testsecrettoken")  # Token for tests
+    ARCHIVE_DIR = None
@@ -0,0 +1,558 @@
+import logging
+import multiprocessing
+import multiprocessing.connection
+import random
+import re
+import time
+from collections import Counter, namedtuple
+from datetime import datetime
+from decimal import Decimal
+
+import requests
+from api.app import MonitorSource, Transaction, db
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+# ERC-20 Transfer(address,address,uint256)
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+SYMBOL_SELECTOR = "0x95d89b41"
+DECIMALS_SELECTOR = "0x313ce567"
+
+# The frontend appends "lock:<weeks>" to the transaction data; missing or
+# invalid memos fall back to three months.
+MEMO_PATTERN = re.compile(rb"lock:(\d{1,4})$")
+DEFAULT_LOCK_WEEKS = 12
+
+Source = namedtuple(
+    "Source",
+    [
+        "chain_id",
+        "rpc_url",
+        "safe_address",
+        "start_block",
+        "usdc_address",
+        "usdc_decimals",
+        "native_symbol",
+        "confirmations",
+        "max_block_range",
+    ],
+)
+Source.__new__.__defaults__ = (6, "ETH", 12, 2000)
+
+
+def source_key(source):
+    return f"{source.chain_id}:{source.safe_address.lower()}"
+
+
+def load_source(config):
+    """
+    Build a Source from a dict, e.g. one entry of the MONITOR_SOURCES file.
+    """
+    fields = {name: config[name] for name in Source._fields if name in config}
+    required = Source._fields[: len(Source._fields) - len(Source.__new__.__defaults__)]
+    missing = [name for name in required if name not in fields]
+    if missing:
+        raise ValueError(f'Missing source fields: {", ".join(missing)}.')
+    return Source(**fields)
+
+
+class RpcError(Exception):
+    pass
+
+
+def describe_error(e):
+    """
+    Summarise a worker error for logs and the monitor API. RPC URLs often
+    embed an API key, so request errors only keep the status code or type.
+    """
+    if isinstance(e, requests.HTTPError) and e.response is not None:
+        return f"HTTPError: {e.response.status_code}"
+    if isinstance(e, requests.RequestException):
+        return type(e).__name__
+    return f"{type(e).__name__}: {e}"[:255]
+
+
+class RpcClient:
+    """
+    Minimal JSON-RPC client. `batch` sends several calls in one HTTP request.
+    """
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def batch(self, calls):
+        if not calls:
+            return []
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(calls)
+        ]
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        results = {}
+        for item in response.json():
+            if "error" in item:
+                raise RpcError(f'{calls[item["id"]][0]}: {item["error"]}')
+            results[item["id"]] = item["result"]
+        return [results[i] for i in range(len(calls))]
+
+    def call(self, method, *params):
+        return self.batch([(method, list(params))])[0]
+
+
+def _address_topic(address):
+    return "0x" + "0" * 24 + address[2:].lower()
+
+
+def _decode_string(result):
+    data = bytes.fromhex(result[2:])
+    if len(data) == 32:
+        # Some tokens (e.g. MKR) return bytes32 instead of string
+        return data.rstrip(b"\0").decode("utf-8", "replace")
+    length = int.from_bytes(data[32:64], "big")
+    return data[64 : 64 + length].decode("utf-8", "replace")
+
+
+def parse_lock_weeks(input_data):
+    """
+    Read the lock duration from the memo appended to the transaction data.
+    """
+    try:
+        data = bytes.fromhex(input_data[2:])
+    except ValueError:
+        return DEFAULT_LOCK_WEEKS
+    match = MEMO_PATTERN.search(data)
+    if match is None or int(match.group(1)) <= 0:
+        return DEFAULT_LOCK_WEEKS
+    return int(match.group(1))
+
+
+class DepositScanner:
+    """
+    Finds USDC transfers into one Safe and turns them into transaction rows.
+    Runs inside a source worker process.
+    """
+
+    def __init__(self, source, client):
+        self.source = source
+        self.client = client
+        self.tokens = {source.usdc_address.lower(): ("USDC", source.usdc_decimals)}
+
+    def head(self):
+        return int(self.client.call("eth_blockNumber"), 16)
+
+    def _token(self, address):
+        address = address.lower()
+        if address not in self.tokens:
+            symbol, decimals = self.client.batch(
+                [
+                    ("eth_call", [{"to": address, "data": SYMBOL_SELECTOR}, "latest"]),
+                    (
+                        "eth_call",
+                        [{"to": address, "data": DECIMALS_SELECTOR}, "latest"],
+                    ),
+                ]
+            )
+            self.tokens[address] = (_decode_string(symbol)[:10], int(decimals, 16))
+        return self.tokens[address]
+
+    def scan(self, from_block, to_block):
+        source = self.source
+        logs = self.client.call(
+            "eth_getLogs",
+            {
+                "fromBlock": hex(from_block),
+                "toBlock": hex(to_block),
+                "address": source.usdc_address,
+                "topics": [TRANSFER_TOPIC, None, _address_topic(source.safe_address)],
+            },
+        )
+        if not logs:
+            return []
+
+        # A swap-and-deposit may emit several transfers into the Safe
+        received = {}
+        for log in logs:
+            if log.get("removed"):
+                continue
+            amount = int(log["data"], 16)
+            received[log["transactionHash"]] = (
+                received.get(log["transactionHash"], 0) + amount
+            )
+        hashes = list(received)
+        block_numbers = sorted({log["blockNumber"] for log in logs})
+
+        results = self.client.batch(
+            [("eth_getTransactionByHash", [h]) for h in hashes]
+            + [("eth_getTransactionReceipt", [h]) for h in hashes]
+            + [("eth_getBlockByNumber", [n, False]) for n in block_numbers]
+        )
+        txs = results[: len(hashes)]
+        receipts = results[len(hashes) : 2 * len(hashes)]
+        if None in results[2 * len(hashes) :]:
+            raise RpcError("block not found")
+        blocks = {
+            n: int(block["timestamp"], 16)
+            for n, block in zip(block_numbers, results[2 * len(hashes) :])
+        }
+
+        rows = []
+        for tx_hash, tx, receipt in zip(hashes, txs, receipts):
+            # Load-balanced nodes can lag behind the one that served the
+            # logs; fail the range so it is retried instead of dropped.
+            if tx is None or receipt is None:
+                raise RpcError(f"{tx_hash} not found")
+            if int(receipt["status"], 16) != 1:
+                continue
+            usdc_amount = Decimal(received[tx_hash]) / 10**source.usdc_decimals
+            original_asset, original_amount = self._original(tx, receipt, usdc_amount)
+            rows.append(
+                {
+                    "chain_id": source.chain_id,
+                    "user_address": tx["from"],
+                    "original_asset": original_asset,
+                    "original_amount": original_amount,
+                    "usdc_amount": usdc_amount,
+                    "lock_duration_weeks": parse_lock_weeks(tx["input"]),
+                    "transaction_hash": tx_hash,
+                    "timestamp": datetime.utcfromtimestamp(
+                        blocks[receipt["blockNumber"]]
+                    ),
+                }
+            )
+        return rows
+
+    def _original(self, tx, receipt, usdc_amount):
+        """
+        Work out what the user paid in: native value sent with the
+        transaction, else the first token the sender transferred out.
+        """
+        value = int(tx["value"], 16)
+        if value > 0:
+            return self.source.native_symbol, Decimal(value) / 10**18
+        sender = _address_topic(tx["from"])
+        for log in receipt["logs"]:
+            topics = log["topics"]
+            if len(topics) == 3 and topics[0] == TRANSFER_TOPIC and topics[1] == sender:
+                symbol, decimals = self._token(log["address"])
+                return symbol, Decimal(int(log["data"], 16)) / 10**decimals
+        return "USDC", usdc_amount
+
+
+class Backoff:
+    """
+    Exponential backoff with full jitter.
+    """
+
+    def __init__(self, base=1.0, cap=60.0):
+        self.base = base
+        self.cap = cap
+        self.attempts = 0
+
+    def next(self):
+        delay = min(self.cap, self.base * 2**self.attempts)
+        self.attempts += 1
+        return random.uniform(0, delay)
+
+    def reset(self):
+        self.attempts = 0
+
+
+def run_source(source, start_block, out, stop, poll_interval, backoff_base):
+    """
+    Worker process: scan one source from `start_block` and send results over
+    `out`. Progress is kept in memory only; the writer persists checkpoints.
+    """
+    key = source_key(source)
+    scanner = DepositScanner(source, RpcClient(source.rpc_url))
+    backoff = Backoff(base=backoff_base)
+    next_block = start_block
+    while not stop.is_set():
+        try:
+            head = scanner.head()
+            to_block = min(
+                head - source.confirmations, next_block + source.max_block_range - 1
+            )
+            if to_block < next_block:
+                out.send({"source": key, "head": head, "to_block": next_block - 1})
+                stop.wait(poll_interval)
+                continue
+            rows = scanner.scan(next_block, to_block)
+            out.send({"source": key, "head": head, "to_block": to_block, "rows": rows})
+            next_block = to_block + 1
+            backoff.reset()
+        except Exception as e:
+            # Anything a node sends back can be malformed; report it and
+            # retry the same range rather than letting the worker die.
+            out.send({"source": key, "error": describe_error(e)})
+            stop.wait(backoff.next())
+
+
+class _SourceStats:
+    """Writer-side counters used to derive per-source throughput."""
+
+    # Weight of the newest window in the moving averages
+    ALPHA = 0.3
+
+    def __init__(self, last_block):
+        self.last_block = last_block
+        self.head = None
+        self.blocks = 0
+        self.deposits = 0
+        self.last_error = None
+        self.window_start = time.monotonic()
+        self.blocks_per_second = 0.0
+        self.deposits_per_second = 0.0
+
+    def roll(self):
+        now = time.monotonic()
+        elapsed = now - self.window_start
+        if elapsed > 0:
+            self.blocks_per_second += self.ALPHA * (
+                self.blocks / elapsed - self.blocks_per_second
+            )
+            self.deposits_per_second += self.ALPHA * (
+                self.deposits / elapsed - self.deposits_per_second
+            )
+        self.blocks = self.deposits = 0
+        self.window_start = now
+
+
+class Monitor:
+    """
+    Runs one worker process per source and a single batched writer.
+
+    Workers only talk to their RPC endpoint. The writer (the calling process)
+    collects their results and commits new deposits together with each
+    source's checkpoint, so a restart resumes exactly after the last
+    committed block. Workers that die are restarted by the writer.
+    """
+
+    def __init__(
+        self,
+        sources,
+        batch_size=500,
+        flush_interval=1.0,
+        poll_interval=5.0,
+        backoff_base=1.0,
+    ):
+        self.sources = list(sources)
+        keys = [source_key(source) for source in self.sources]
+        if len(set(keys)) != len(keys):
+            raise ValueError("Duplicate monitor source.")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.poll_interval = poll_interval
+        self.backoff_base = backoff_base
+        self.stats = {}
+        self.workers = {}
+
+    def _load_checkpoints(self):
+        checkpoints = {}
+        for source in self.sources:
+            key = source_key(source)
+            row = MonitorSource.query.filter_by(key=key).first()
+            if row is None:
+                row = MonitorSource(
+                    key=key,
+                    chain_id=source.chain_id,
+                    safe_address=source.safe_address,
+                    last_block=source.start_block - 1,
+                )
+                db.session.add(row)
+            checkpoints[key] = row.last_block + 1
+            self.stats[key] = _SourceStats(row.last_block)
+        db.session.commit()
+        return checkpoints
+
+    def _flush(self, rows, progress):
+        """
+        Insert `rows` ((source key, row) pairs) that are neither in the table
+        nor archived, and commit them together with each source's progress.
+        """
+        inserted = Counter()
+        if rows:
+            existing = {
+                h
+                for (h,) in db.session.query(Transaction.transaction_hash).filter(
+                    Transaction.transaction_hash.in_(
+                        [row["transaction_hash"] for _, row in rows]
+                    )
+                )
+            }
+            # Archived hashes are no longer covered by the unique constraint
+            archive = current_app.extensions.get("archive")
+            new_rows = []
+            for key, row in rows:
+                tx_hash = row["transaction_hash"]
+                if tx_hash in existing or (archive is not None and tx_hash in archive):
+                    continue
+                existing.add(tx_hash)
+                new_rows.append(row)
+                inserted[key] += 1
+            if new_rows:
+                db.session.execute(Transaction.__table__.insert(), new_rows)
+
+        now = datetime.utcnow()
+        for key in progress:
+            stats = self.stats[key]
+            stats.deposits += inserted[key]
+            stats.roll()
+            MonitorSource.query.filter_by(key=key).update(
+                {
+                    "last_block": stats.last_block,
+                    "head_block": stats.head,
+                    "deposits_total": MonitorSource.deposits_total + inserted[key],
+                    "errors_total": MonitorSource.errors_total
+                    + progress[key]["errors"],
+                    "last_error": stats.last_error,
+                    "blocks_per_second": stats.blocks_per_second,
+                    "deposits_per_second": stats.deposits_per_second,
+                    "updated_at": now,
+                },
+                synchronize_session=False,
+            )
+        db.session.commit()
+
+    def _start_worker(self, source, start_block):
+        # Each worker gets its own pipe and stop event: a worker killed
+        # while holding a shared queue or event lock would block the rest.
+        key = source_key(source)
+        reader, writer = self._context.Pipe(duplex=False)
+        stop = self._context.Event()
+        worker = self._context.Process(
+            target=run_source,
+            args=(
+                source,
+                start_block,
+                writer,
+                stop,
+                self.poll_interval,
+                self.backoff_base,
+            ),
+            name=f"monitor-{key}",
+            daemon=True,
+        )
+        worker.start()
+        writer.close()
+        self.workers[key] = worker
+        self._pipes[key] = reader
+        self._stops[key] = stop
+
+    def _receive(self, timeout, rows, progress):
+        ready = multiprocessing.connection.wait(list(self._pipes.values()), timeout)
+        for key, reader in list(self._pipes.items()):
+            if reader not in ready:
+                continue
+            try:
+                message = reader.recv()
+            except (EOFError, OSError):
+                # The worker exited; _check_workers restarts it
+                reader.close()
+                del self._pipes[key]
+                continue
+            self._record(message, rows, progress)
+            if "error" not in message:
+                self._restart_backoff[key].reset()
+
+    def _check_workers(self, rows, progress):
+        """
+        Restart workers that died (e.g. killed by the OOM killer) with
+        backoff. They resume after the last block the writer has received;
+        anything received but not yet committed is still in the batch.
+        """
+        now = time.monotonic()
+        for source in self.sources:
+            key = source_key(source)
+            worker = self.workers[key]
+            if worker.is_alive():
+                continue
+            if key not in self._restart_at:
+                self._record(
+                    {
+                        "source": key,
+                        "error": f"worker exited with code {worker.exitcode}",
+                    },
+                    rows,
+                    progress,
+                )
+                self._restart_at[key] = now + self._restart_backoff[key].next()
+            elif now >= self._restart_at[key]:
+                del self._restart_at[key]
+                reader = self._pipes.pop(key, None)
+                if reader is not None:
+                    reader.close()
+                self._start_worker(source, self.stats[key].last_block + 1)
+
+    def run(self, should_stop=lambda: False):
+        """
+        Start the workers and write their results until `should_stop()`
+        returns true. Must be called inside an application context.
+        """
+        checkpoints = self._load_checkpoints()
+        self._context = multiprocessing.get_context("spawn")
+        self.workers, self._pipes, self._stops = {}, {}, {}
+        self._restart_at = {}
+        self._restart_backoff = {
+            source_key(source): Backoff(base=self.backoff_base)
+            for source in self.sources
+        }
+        for source in self.sources:
+            self._start_worker(source, checkpoints[source_key(source)])
+
+        rows, progress = [], {}
+        last_flush = time.monotonic()
+        try:
+            while not should_stop():
+                timeout = max(
+                    0.0, self.flush_interval - (time.monotonic() - last_flush)
+                )
+                self._receive(timeout, rows, progress)
+                self._check_workers(rows, progress)
+
+                if len(rows) >= self.batch_size or (
+                    progress and time.monotonic() - last_flush >= self.flush_interval
+                ):
+                    try:
+                        self._flush(rows, progress)
+                        rows, progress = [], {}
+                    except Exception:
+                        # Keep the batch and retry on the next flush
+                        db.session.rollback()
+                        logger.exception("Failed to write monitor batch")
+                    last_flush = time.monotonic()
+        finally:
+            for key, worker in self.workers.items():
+                if worker.is_alive():
+                    self._stops[key].set()
+            if progress:
+                try:
+                    self._flush(rows, progress)
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("Failed to write final monitor batch")
+            for worker in self.workers.values():
+                worker.join(timeout=5)
+                if worker.is_alive():
+                    worker.terminate()
+            for reader in self._pipes.values():
+                reader.close()
+
+    def _record(self, message, rows, progress):
+        key = message["source"]
+        stats = self.stats[key]
+        counters = progress.setdefault(key, {"errors": 0})
+        if "error" in message:
+            stats.last_error = message["error"]
+            counters["errors"] += 1
+            logger.warning("Source %s: %s", key, message["error"])
+            return
+        # Deposits are counted when flushed, after duplicates are dropped
+        rows.extend((key, row) for row in message.get("rows", []))
+        stats.blocks += max(0, message["to_block"] - stats.last_block)
+        stats.last_block = max(stats.last_block, message["to_block"])
+        stats.head = message["head"]
+        stats.last_error = None
@@ -0,0 +1,195 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_ID_PATTERN = re.compile(r"^\d+-\d+-\d+$")
+
+# Lines of pstats output kept per report
+PSTATS_LIMIT = 60
+
+
+class ProfileStore:
+    """
+    Bounded on-disk ring of profile reports, one JSON file per request.
+
+    Report ids sort by creation time; once more than `max_reports` exist the
+    oldest are deleted.
+    """
+
+    def __init__(self, directory, max_reports=100):
+        self.directory = directory
+        self.max_reports = max_reports
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+    def save(self, report):
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            self._sequence += 1
+            report_id = f"{time.time_ns()}-{os.getpid()}-{self._sequence}"
+            report = dict(report, id=report_id)
+            path = os.path.join(self.directory, report_id + ".json")
+            with open(path + ".tmp", "w") as f:
+                json.dump(report, f)
+            os.replace(path + ".tmp", path)
+
+            for old_id in self.ids()[self.max_reports :]:
+                try:
+                    os.remove(os.path.join(self.directory, old_id + ".json"))
+                except FileNotFoundError:
+                    pass
+        return report_id
+
+    def ids(self):
+        """Report ids, newest first."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        # Ignore anything in the directory that is not a report
+        ids = [
+            name[:-5]
+            for name in names
+            if name.endswith(".json") and PROFILE_ID_PATTERN.match(name[:-5])
+        ]
+        return sorted(ids, key=lambda i: tuple(map(int, i.split("-"))), reverse=True)
+
+    def load(self, report_id):
+        if not PROFILE_ID_PATTERN.match(report_id):
+            return None
+        try:
+            with open(os.path.join(self.directory, report_id + ".json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and "profile" in g:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and "profile" in g:
+        starts = conn.info.get("profile_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        g.profile["queries"].append(
+            {"statement": statement, "duration_ms": round(elapsed * 1000, 3)}
+        )
+
+
+def _profile_mode():
+    """
+    Return (enabled, requested). `requested` is only true for an `X-Profile: 1`
+    request that carries a valid API key named in PROFILE_KEYS.
+    """
+    enabled = current_app.config["PROFILE_ENABLED"]
+    requested = False
+    if request.headers.get(PROFILE_HEADER) == "1":
+        # Explicit captures bypass PROFILE_SLOW_MS and share the report ring,
+        # so only allow-listed keys (not every ingester) may ask for them
+        auth_header = request.headers.get("Authorization", "")
+        if auth_header.startswith("Bearer "):
+            api_key = current_app.extensions["api_keys"].verify(
+                auth_header.split(" ")[1]
+            )
+            requested = (
+                api_key is not None
+                and api_key.name in current_app.config["PROFILE_KEYS"]
+            )
+    return enabled, requested
+
+
+def _start_profile():
+    enabled, requested = _profile_mode()
+    if not (enabled or requested):
+        return
+    profiler = None
+    if requested or current_app.config["PROFILE_CALLS"]:
+        profiler = cProfile.Profile()
+    g.profile = {
+        "requested": requested,
+        "profiler": profiler,
+        "queries": [],
+        "started_at": datetime.utcnow().isoformat(),
+        "start": time.perf_counter(),
+    }
+    if profiler is not None:
+        profiler.enable()
+
+
+def _finish_profile(response):
+    profile = g.pop("profile", None)
+    if profile is None:
+        return response
+    profiler = profile["profiler"]
+    if profiler is not None:
+        profiler.disable()
+    duration_ms = (time.perf_counter() - profile["start"]) * 1000
+
+    # Explicit requests are always kept; the rest only when slow
+    if not profile["requested"] and duration_ms < current_app.config["PROFILE_SLOW_MS"]:
+        return response
+
+    calls = None
+    if profiler is not None:
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(
+            PSTATS_LIMIT
+        )
+        calls = stream.getvalue()
+
+    queries = profile["queries"]
+    report_id = current_app.extensions["profiles"].save(
+        {
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "status": response.status_code,
+            "started_at": profile["started_at"],
+            "duration_ms": round(duration_ms, 3),
+            "query_count": len(queries),
+            "query_ms": round(sum(q["duration_ms"] for q in queries), 3),
+            "queries": queries,
+            "calls": calls,
+        }
+    )
+    response.headers[PROFILE_ID_HEADER] = report_id
+    return response
+
+
+def _discard_profile(exc):
+    # Make sure the profiler never stays enabled past the request
+    profile = g.pop("profile", None)
+    if profile is not None and profile["profiler"] is not None:
+        profile["profiler"].disable()
+
+
+def init_profiling(app):
+    """
+    Register request hooks that profile a request when PROFILE_ENABLED is set
+    or when it carries `X-Profile: 1` and a valid API key. With profiling off,
+    the cost per request is one config check and one header lookup.
+    """
+    app.extensions["profiles"] = ProfileStore(
+        app.config["PROFILE_DIR"], app.config["PROFILE_MAX_REPORTS"]
+    )
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+    app.teardown_request(_discard_profile)
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,247 @@
+# ./api/tests/test_archive.py
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from api.app import Transaction, archive_transactions, create_app, db
+from api.archive import COLUMNS as ARCHIVE_COLUMNS
+from api.archive import Archive, read_manifest, write_segment
+from api.config import TestConfig
+
+
+def make_row(i, timestamp):
+    return {
+        "id": i,
+        "chain_id": 1,
+        "user_address": "0x" + str(i % 3).zfill(40),
+        "original_asset": "ETH",
+        "original_amount": Decimal("1.123456789012345678"),
+        "usdc_amount": Decimal(1000 + i),
+        "lock_duration_weeks": 12,
+        "transaction_hash": f"0x{str(i).zfill(64)}",
+        "timestamp": timestamp,
+    }
+
+
+@pytest.fixture
+def archive_dir(tmp_path):
+    return str(tmp_path / "archive")
+
+
+@pytest.fixture
+def app(archive_dir):
+    class ArchiveConfig(TestConfig):
+        ARCHIVE_DIR = archive_dir
+
+    app = create_app(ArchiveConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_segment_lookup(archive_dir):
+    start = datetime(2024, 1, 1)
+    write_segment(
+        archive_dir, [make_row(i, start + timedelta(hours=i)) for i in range(50)]
+    )
+    write_segment(
+        archive_dir,
+        [make_row(i, start + timedelta(days=30, hours=i)) for i in range(50, 80)],
+    )
+
+    archive = Archive(archive_dir)
+    assert len(archive.segments) == 2
+    found = archive.get(f"0x{str(63).zfill(64)}")
+    assert found["id"] == 63
+    assert found["usdc_amount"] == 1063
+    assert found["timestamp"] == (start + timedelta(days=30, hours=63)).isoformat()
+    assert archive.get("0x" + "f" * 64) is None
+    assert f"0x{str(5).zfill(64)}" in archive
+
+
+def test_iter_transactions_filters(archive_dir):
+    start = datetime(2024, 1, 1)
+    write_segment(
+        archive_dir, [make_row(i, start + timedelta(days=i)) for i in range(10)]
+    )
+    archive = Archive(archive_dir)
+
+    rows = list(
+        archive.iter_transactions(
+            start=start + timedelta(days=2), end=start + timedelta(days=5)
+        )
+    )
+    assert [row["id"] for row in rows] == [2, 3, 4]
+
+    rows = list(archive.iter_transactions(user_address="0x" + "1".zfill(40)))
+    assert [row["id"] for row in rows] == [1, 4, 7]
+
+    assert list(archive.iter_transactions(start=start + timedelta(days=30))) == []
+
+
+def test_archive_moves_old_rows(client, archive_dir):
+    old = datetime.utcnow() - timedelta(days=400)
+    db.session.add_all(
+        [
+            Transaction(
+                user_address="0x" + "1" * 40,
+                original_asset="ETH",
+                original_amount=1.5,
+                usdc_amount=3000,
+                lock_duration_weeks=12,
+                transaction_hash=f"0x{str(i).zfill(64)}",
+                timestamp=old,
+            )
+            for i in range(5)
+        ]
+        + [
+            Transaction(
+                user_address="0x" + "1" * 40,
+                original_asset="DAI",
+                original_amount=200,
+                usdc_amount=200,
+                lock_duration_weeks=24,
+                transaction_hash="0x" + "a" * 64,
+            )
+        ]
+    )
+    db.session.commit()
+
+    cutoff = datetime.utcnow() - timedelta(days=180)
+    assert archive_transactions(cutoff, archive_dir, segment_rows=2) == 5
+    assert Transaction.query.count() == 1
+    assert len(read_manifest(archive_dir)["segments"]) == 3
+
+    # Archived rows are still served by hash, the hot row still comes from the DB
+    response = client.get(f"/api/transactions/0x{str(3).zfill(64)}")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["original_amount"] == 1.5
+    assert data["timestamp"] == old.isoformat()
+    assert client.get("/api/transactions/0x" + "a" * 64).status_code == 200
+
+    # The unique constraint no longer sees archived hashes, the API still does
+    headers = {"Authorization": "Bearer testsecrettoken"}
+    response = client.post(
+        "/api/transactions",
+        json={
+            "user_address": "0x" + "1" * 40,
+            "original_asset": "ETH",
+            "original_amount": 1.5,
+            "usdc_amount": 3000,
+            "lock_duration_weeks": 12,
+            "transaction_hash": f"0x{str(3).zfill(64)}",
+        },
+        headers=headers,
+    )
+    assert response.status_code == 409
+
+
+def test_bloom_filter_skips_segments(archive_dir):
+    start = datetime(2024, 1, 1)
+    for n in range(3):
+        write_segment(
+            archive_dir,
+            [make_row(i, start) for i in range(n * 100, (n + 1) * 100)],
+        )
+    archive = Archive(archive_dir)
+
+    assert archive.get("0x" + "f" * 64) is None
+    # A miss is answered by the bloom filters without searching any index
+    assert archive._indexes == {}
+
+    assert archive.get(f"0x{str(150).zfill(64)}")["id"] == 150
+    assert list(archive._indexes) == ["seg-000002"]
+
+
+def test_archive_resumes_interrupted_run(client, archive_dir):
+    old = datetime.utcnow() - timedelta(days=400)
+    for i in range(3):
+        db.session.add(
+            Transaction(
+                user_address="0x" + "1" * 40,
+                original_asset="ETH",
+                original_amount=1.5,
+                usdc_amount=3000,
+                lock_duration_weeks=12,
+                transaction_hash=f"0x{str(i).zfill(64)}",
+                timestamp=old,
+            )
+        )
+    db.session.commit()
+
+    # Simulate a run that wrote its segment but stopped before deleting rows
+    columns = [getattr(Transaction, name) for name, _ in ARCHIVE_COLUMNS]
+    rows = Transaction.query.with_entities(*columns).order_by(Transaction.id).all()
+    write_segment(archive_dir, [row._asdict() for row in rows[:2]])
+
+    cutoff = datetime.utcnow() - timedelta(days=180)
+    assert archive_transactions(cutoff, archive_dir, segment_rows=10) == 1
+    assert Transaction.query.count() == 0
+
+    archived = [row["id"] for row in Archive(archive_dir).iter_transactions()]
+    assert sorted(archived) == [row.id for row in rows]
+
+
+def test_active_locks_stay_in_table(client, archive_dir):
+    old = datetime.utcnow() - timedelta(days=200)
+    for i, weeks in enumerate([12, 104]):
+        db.session.add(
+            Transaction(
+                user_address="0x" + "1" * 40,
+                original_asset="ETH",
+                original_amount=1.5,
+                usdc_amount=3000,
+                lock_duration_weeks=weeks,
+                transaction_hash=f"0x{str(i).zfill(64)}",
+                timestamp=old,
+            )
+        )
+    db.session.commit()
+
+    cutoff = datetime.utcnow() - timedelta(days=180)
+    assert archive_transactions(cutoff, archive_dir, segment_rows=10) == 1
+    assert [tx.lock_duration_weeks for tx in Transaction.query] == [104]
+
+
+def test_list_endpoints_include_archived_rows(client, archive_dir):
+    start = datetime.utcnow() - timedelta(days=500)
+    user = "0x" + "1" * 40
+    for i in range(6):
+        db.session.add(
+            Transaction(
+                user_address=user if i % 2 else "0x" + "2" * 40,
+                original_asset="ETH",
+                original_amount=1.5,
+                usdc_amount=3000,
+                lock_duration_weeks=12,
+                transaction_hash=f"0x{str(i).zfill(64)}",
+                # Rows 0-3 are archived, rows 4-5 stay hot
+                timestamp=start + timedelta(days=100 * i),
+            )
+        )
+    db.session.commit()
+    cutoff = datetime.utcnow() - timedelta(days=180)
+    assert archive_transactions(cutoff, archive_dir, segment_rows=3) == 4
+
+    response = client.get(f"/api/users/{user}/transactions?per_page=2")
+    data = response.get_json()
+    assert (data["total_transactions"], data["total_pages"]) == (3, 2)
+    hashes = [tx["transaction_hash"] for tx in data["transactions"]]
+    assert hashes == [f"0x{str(i).zfill(64)}" for i in (5, 3)]
+    data = client.get(f"/api/users/{user}/transactions?per_page=2&page=2").get_json()
+    assert [tx["transaction_hash"] for tx in data["transactions"]] == [
+        f"0x{str(1).zfill(64)}"
+    ]
+
+    data = client.get("/api/transactions?per_page=4&page=2").get_json()
+    assert data["total_transactions"] == 6
+    assert [tx["id"] for tx in data["transactions"]] == [2, 1]
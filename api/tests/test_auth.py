@@ -0,0 +1,173 @@
+# ./api/tests/test_auth.py
+
+import pytest
+from api.app import ApiKey, create_app, db
+from api.auth import ApiKeyEntry, ApiKeyRegistry, RateLimit, TokenBucket, hash_api_key
+from api.config import TestConfig
+
+
+class LimitedConfig(TestConfig):
+    RATE_LIMIT_READ_RATE = 1
+    RATE_LIMIT_READ_BURST = 2
+    RATE_LIMIT_WRITE_RATE = 1
+    RATE_LIMIT_WRITE_BURST = 1
+
+
+@pytest.fixture
+def app():
+    app = create_app(LimitedConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def transaction_data(i):
+    return {
+        "user_address": "0x1234567890abcdef1234567890abcdef12345678",
+        "original_asset": "ETH",
+        "original_amount": 1.5,
+        "usdc_amount": 3000,
+        "lock_duration_weeks": 12,
+        "transaction_hash": f"0x{str(i).zfill(64)}",
+    }
+
+
+def test_token_bucket_refills():
+    bucket = TokenBucket(rate=2, burst=2)
+    now = bucket.updated
+    assert bucket.consume(now) == 0
+    assert bucket.consume(now) == 0
+    assert bucket.consume(now) == pytest.approx(0.5)
+    assert bucket.consume(now + 0.5) == 0
+
+
+def test_registry_caches_loader():
+    calls = []
+    limit = RateLimit(1, 1)
+
+    def loader():
+        calls.append(1)
+        return [ApiKeyEntry("a", hash_api_key("secret"), limit, limit)]
+
+    registry = ApiKeyRegistry(loader, ttl=60)
+    assert registry.verify("secret").name == "a"
+    assert registry.verify("wrong") is None
+    assert registry.verify("secret").name == "a"
+    assert len(calls) == 1
+
+    registry.invalidate()
+    registry.verify("secret")
+    assert len(calls) == 2
+
+
+def test_registered_key_is_accepted(client, app):
+    result = app.test_cli_runner().invoke(args=["api-keys", "create", "ingester"])
+    assert result.exit_code == 0
+    raw_key = result.output.strip()
+    assert ApiKey.query.filter_by(name="ingester").one().key_hash == hash_api_key(
+        raw_key
+    )
+
+    headers = {"Authorization": f"Bearer {raw_key}"}
+    response = client.post(
+        "/api/transactions", json=transaction_data(1), headers=headers
+    )
+    assert response.status_code == 201
+
+    result = app.test_cli_runner().invoke(args=["api-keys", "revoke", "ingester"])
+    assert result.exit_code == 0
+    response = client.post(
+        "/api/transactions", json=transaction_data(2), headers=headers
+    )
+    assert response.status_code == 403
+
+
+def test_write_rate_limit(client):
+    headers = {"Authorization": "Bearer testsecrettoken"}
+    response = client.post(
+        "/api/transactions", json=transaction_data(1), headers=headers
+    )
+    assert response.status_code == 201
+    response = client.post(
+        "/api/transactions", json=transaction_data(2), headers=headers
+    )
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert response.get_json()["error"] == "Rate limit exceeded."
+
+
+def test_per_key_limits_are_independent(client, app):
+    result = app.test_cli_runner().invoke(args=["api-keys", "create", "other"])
+    other_headers = {"Authorization": f"Bearer {result.output.strip()}"}
+    headers = {"Authorization": "Bearer testsecrettoken"}
+
+    assert (
+        client.post(
+            "/api/transactions", json=transaction_data(1), headers=headers
+        ).status_code
+        == 201
+    )
+    assert (
+        client.post(
+            "/api/transactions", json=transaction_data(2), headers=other_headers
+        ).status_code
+        == 201
+    )
+
+
+def test_read_rate_limit(client):
+    headers = {"Authorization": "Bearer testsecrettoken"}
+    assert client.get("/api/transactions", headers=headers).status_code == 200
+    assert client.get("/api/transactions", headers=headers).status_code == 200
+    response = client.get("/api/transactions", headers=headers)
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+
+def test_anonymous_reads_unlimited_by_default(client, app):
+    for _ in range(5):
+        assert client.get("/api/transactions").status_code == 200
+
+    app.config.update(RATE_LIMIT_ANON_RATE=1, RATE_LIMIT_ANON_BURST=1)
+    assert client.get("/api/transactions").status_code == 200
+    assert client.get("/api/transactions").status_code == 429
+    # Keyed reads have their own bucket
+    headers = {"Authorization": "Bearer testsecrettoken"}
+    assert client.get("/api/transactions", headers=headers).status_code == 200
+
+
+def test_reserved_key_name_rejected(app):
+    result = app.test_cli_runner().invoke(args=["api-keys", "create", "default"])
+    assert result.exit_code != 0
+    assert "reserved" in result.output
+    assert ApiKey.query.count() == 0
+
+
+def test_zero_refill_rate_caps_retry_after(client, app):
+    app.config.update(RATE_LIMIT_WRITE_RATE=0, RATE_LIMIT_WRITE_BURST=1)
+    headers = {"Authorization": "Bearer testsecrettoken"}
+    response = client.post(
+        "/api/transactions", json=transaction_data(1), headers=headers
+    )
+    assert response.status_code == 201
+    response = client.post(
+        "/api/transactions", json=transaction_data(2), headers=headers
+    )
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3600"
+
+
+def test_negative_key_limits_rejected(app):
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["api-keys", "create", "x", "--write-rate", "-1"])
+    assert result.exit_code != 0
+    result = runner.invoke(args=["api-keys", "create", "x", "--read-burst", "-5"])
+    assert result.exit_code != 0
+    assert ApiKey.query.count() == 0
@@ -0,0 +1,60 @@
+# ./api/tests/test_generate_transactions.py
+
+import importlib.util
+import os
+from datetime import datetime
+
+from api.app import Transaction, create_app, db
+from api.config import TestConfig
+
+SCRIPT = os.path.join(
+    os.path.dirname(__file__), "..", "..", "scripts", "generate_transactions.py"
+)
+
+
+def load_script():
+    spec = importlib.util.spec_from_file_location("generate_transactions", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def generate(tmp_path, name, seed):
+    class GeneratorConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / name}"
+
+    load_script().generate_transactions(
+        500,
+        batch_size=200,
+        seed=seed,
+        users=50,
+        zipf_s=1.1,
+        months=3,
+        end=datetime(2024, 10, 1),
+        config_class=GeneratorConfig,
+    )
+    app = create_app(GeneratorConfig)
+    with app.app_context():
+        rows = [tx.to_dict() for tx in Transaction.query.order_by(Transaction.id).all()]
+        db.session.remove()
+    return rows
+
+
+def test_same_seed_produces_same_rows(tmp_path):
+    first = generate(tmp_path, "first.db", seed=7)
+    second = generate(tmp_path, "second.db", seed=7)
+    assert len(first) == 500
+    assert first == second
+    assert generate(tmp_path, "other.db", seed=8) != first
+
+
+def test_stablecoins_deposit_at_par(tmp_path):
+    rows = generate(tmp_path, "par.db", seed=1)
+    stable = [row for row in rows if row["original_asset"] in ("USDC", "USDT", "DAI")]
+    assert stable
+    assert all(row["original_amount"] == row["usdc_amount"] for row in stable)
+    assert any(
+        row["original_amount"] != row["usdc_amount"]
+        for row in rows
+        if row["original_asset"] == "ETH"
+    )
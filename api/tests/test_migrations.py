@@ -0,0 +1,45 @@
+# ./api/tests/test_migrations.py
+
+import os
+import sqlite3
+
+from api.app import Transaction, create_app, db
+from api.config import TestConfig
+from flask_migrate import upgrade
+
+MIGRATIONS = os.path.join(os.path.dirname(__file__), "..", "..", "migrations")
+
+
+def test_upgrade_adds_chain_id_to_existing_database(tmp_path):
+    # The schema as created by db.create_all() before chain_id existed
+    path = tmp_path / "old.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript("""
+            CREATE TABLE transactions (
+                id INTEGER NOT NULL PRIMARY KEY,
+                user_address VARCHAR(42) NOT NULL,
+                original_asset VARCHAR(10) NOT NULL,
+                original_amount NUMERIC NOT NULL,
+                usdc_amount NUMERIC NOT NULL,
+                lock_duration_weeks INTEGER NOT NULL,
+                transaction_hash VARCHAR(66) NOT NULL UNIQUE,
+                timestamp DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL
+            );
+            CREATE INDEX ix_transactions_user_address ON transactions (user_address);
+            INSERT INTO transactions (user_address, original_asset, original_amount,
+                usdc_amount, lock_duration_weeks, transaction_hash)
+            VALUES ('0x1', 'ETH', 1, 2000, 12, '0xabc');
+            """)
+    conn.close()
+
+    class OldConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+
+    # Startup already creates the new tables; the migration must cope
+    app = create_app(OldConfig)
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+        assert Transaction.query.one().chain_id == 1
+        indexes = db.inspect(db.engine).get_indexes("transactions")
+        assert "ix_transactions_chain_id" in {index["name"] for index in indexes}
+        db.session.remove()
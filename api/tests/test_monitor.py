@@ -0,0 +1,386 @@
+# ./api/tests/test_monitor.py
+
+import json
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from api.app import MonitorSource, Transaction, create_app, db
+from api.archive import write_segment
+from api.config import TestConfig
+from api.monitor import (
+    DEFAULT_LOCK_WEEKS,
+    TRANSFER_TOPIC,
+    DepositScanner,
+    Monitor,
+    RpcClient,
+    RpcError,
+    Source,
+    describe_error,
+    load_source,
+    parse_lock_weeks,
+)
+
+USDC = "0x" + "c" * 40
+DAI = "0x" + "d" * 40
+ROUTER = "0x" + "e" * 40
+
+
+def topic(address):
+    return "0x" + "0" * 24 + address[2:]
+
+
+def memo(weeks):
+    return "0xa9059cbb" + f"lock:{weeks}".encode().hex()
+
+
+def abi_string(value):
+    data = value.encode()
+    return (
+        "0x"
+        + (32).to_bytes(32, "big").hex()
+        + len(data).to_bytes(32, "big").hex()
+        + data.ljust(32, b"\0").hex()
+    )
+
+
+class FakeChain:
+    """
+    Just enough of an EVM JSON-RPC node to serve USDC deposits into a Safe.
+    """
+
+    def __init__(self, safe, head, deposits, fail_requests=0, lagging_lookups=0):
+        self.safe = safe
+        self.head = head
+        self.deposits = {d["hash"]: d for d in deposits}
+        self.fail_requests = fail_requests
+        # Transaction lookups answered with null, like a node behind the
+        # one that served the logs
+        self.lagging_lookups = lagging_lookups
+
+    def _transfer_log(self, deposit, token, sender, to, amount):
+        return {
+            "address": token,
+            "topics": [TRANSFER_TOPIC, topic(sender), topic(to)],
+            "data": hex(amount),
+            "blockNumber": hex(deposit["block"]),
+            "transactionHash": deposit["hash"],
+        }
+
+    def _logs(self, deposit):
+        logs = []
+        if "dai" in deposit:
+            logs.append(
+                self._transfer_log(
+                    deposit, DAI, deposit["from"], ROUTER, deposit["dai"]
+                )
+            )
+        logs.append(
+            self._transfer_log(deposit, USDC, ROUTER, self.safe, deposit["usdc"])
+        )
+        return logs
+
+    def handle(self, method, params):
+        if method == "eth_blockNumber":
+            return hex(self.head)
+        if method == "eth_getLogs":
+            (query,) = params
+            start, end = int(query["fromBlock"], 16), int(query["toBlock"], 16)
+            return [
+                log
+                for d in self.deposits.values()
+                if start <= d["block"] <= end
+                for log in self._logs(d)
+                if log["address"] == query["address"].lower()
+                and log["topics"][2] == query["topics"][2]
+            ]
+        if method == "eth_getTransactionByHash":
+            if self.lagging_lookups > 0:
+                self.lagging_lookups -= 1
+                return None
+            d = self.deposits[params[0]]
+            return {"from": d["from"], "input": d["input"], "value": hex(d["value"])}
+        if method == "eth_getTransactionReceipt":
+            d = self.deposits[params[0]]
+            return {
+                "status": "0x1",
+                "blockNumber": hex(d["block"]),
+                "logs": self._logs(d),
+            }
+        if method == "eth_getBlockByNumber":
+            return {"timestamp": hex(1700000000 + int(params[0], 16) * 12)}
+        if method == "eth_call":
+            if params[0]["data"] == "0x95d89b41":
+                return abi_string("DAI")
+            return hex(18)
+        raise AssertionError(f"Unexpected RPC method {method}")
+
+
+@pytest.fixture
+def serve_chain():
+    servers = []
+
+    def serve(chain):
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if chain.fail_requests > 0:
+                    chain.fail_requests -= 1
+                    self.send_response(500)
+                    self.end_headers()
+                    return
+                response = json.dumps(
+                    [
+                        {
+                            "jsonrpc": "2.0",
+                            "id": call["id"],
+                            "result": chain.handle(call["method"], call["params"]),
+                        }
+                        for call in body
+                    ]
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+
+
+@pytest.fixture
+def app(tmp_path):
+    class MonitorConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'monitor.db'}"
+        ARCHIVE_DIR = str(tmp_path / "archive")
+
+    app = create_app(MonitorConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def make_deposit(i, block, **extra):
+    deposit = {
+        "hash": f"0x{str(i).zfill(64)}",
+        "block": block,
+        "from": f"0x{str(i).zfill(40)}",
+        "usdc": 250_000_000,
+        "value": 0,
+        "input": memo(24),
+    }
+    deposit.update(extra)
+    return deposit
+
+
+def run_until_caught_up(monitor, targets, timeout=30):
+    deadline = time.monotonic() + timeout
+
+    def caught_up():
+        if time.monotonic() > deadline:
+            return True
+        return all(
+            key in monitor.stats and monitor.stats[key].last_block >= target
+            for key, target in targets.items()
+        )
+
+    monitor.run(caught_up)
+    assert time.monotonic() <= deadline, "monitor did not catch up in time"
+
+
+def test_parse_lock_weeks():
+    assert parse_lock_weeks(memo(52)) == 52
+    assert parse_lock_weeks(memo(0)) == DEFAULT_LOCK_WEEKS
+    assert parse_lock_weeks("0xa9059cbb") == DEFAULT_LOCK_WEEKS
+    assert parse_lock_weeks("0xzz") == DEFAULT_LOCK_WEEKS
+
+
+def test_load_source_requires_fields():
+    with pytest.raises(ValueError, match="usdc_address"):
+        load_source(
+            {"chain_id": 1, "rpc_url": "x", "safe_address": "0x1", "start_block": 0}
+        )
+
+
+def test_describe_error_hides_rpc_url(serve_chain):
+    url = serve_chain(FakeChain(USDC, head=1, deposits=[], fail_requests=1))
+    client = RpcClient(f"{url}/v3/secret-project-id")
+    with pytest.raises(requests.HTTPError) as e:
+        client.call("eth_blockNumber")
+    assert "secret-project-id" in str(e.value)
+    assert describe_error(e.value) == "HTTPError: 500"
+
+    with pytest.raises(requests.ConnectionError) as e:
+        RpcClient("http://127.0.0.1:1/v3/secret-project-id").call("eth_blockNumber")
+    assert describe_error(e.value) == "ConnectionError"
+
+
+def test_scan_retries_missing_transaction(serve_chain):
+    safe = "0x" + "a" * 40
+    chain = FakeChain(safe, head=100, deposits=[make_deposit(1, 50)], lagging_lookups=1)
+    source = Source(1, serve_chain(chain), safe, 1, USDC)
+    scanner = DepositScanner(source, RpcClient(source.rpc_url))
+    with pytest.raises(RpcError, match="not found"):
+        scanner.scan(1, 88)
+    assert [row["transaction_hash"] for row in scanner.scan(1, 88)] == [
+        make_deposit(1, 0)["hash"]
+    ]
+
+
+def test_monitor_multiple_sources(app, serve_chain):
+    safe_a, safe_b = "0x" + "a" * 40, "0x" + "b" * 40
+    mainnet = FakeChain(
+        safe_a,
+        head=120,
+        deposits=[
+            make_deposit(1, 50),
+            make_deposit(2, 60, value=10**18, input="0x"),
+            make_deposit(3, 5),  # before start_block
+            make_deposit(4, 115),  # not yet confirmed
+        ],
+    )
+    # The second chain fails its first requests to exercise backoff
+    other = FakeChain(
+        safe_b,
+        head=40,
+        deposits=[make_deposit(5, 30, dai=250 * 10**18)],
+        fail_requests=2,
+    )
+    sources = [
+        Source(1, serve_chain(mainnet), safe_a, 10, USDC, max_block_range=25),
+        Source(137, serve_chain(other), safe_b, 1, USDC, confirmations=5),
+    ]
+
+    monitor = Monitor(
+        sources, flush_interval=0.05, poll_interval=0.05, backoff_base=0.05
+    )
+    run_until_caught_up(monitor, {f"1:{safe_a}": 108, f"137:{safe_b}": 35})
+
+    deposits = {tx.transaction_hash: tx for tx in Transaction.query.all()}
+    assert sorted(deposits) == [make_deposit(i, 0)["hash"] for i in (1, 2, 5)]
+
+    tx = deposits[make_deposit(1, 0)["hash"]]
+    assert (tx.chain_id, tx.original_asset, float(tx.usdc_amount)) == (1, "USDC", 250)
+    assert tx.lock_duration_weeks == 24
+    assert tx.user_address == make_deposit(1, 0)["from"]
+
+    tx = deposits[make_deposit(2, 0)["hash"]]
+    assert (tx.original_asset, float(tx.original_amount)) == ("ETH", 1)
+    assert tx.lock_duration_weeks == DEFAULT_LOCK_WEEKS
+
+    tx = deposits[make_deposit(5, 0)["hash"]]
+    assert (tx.chain_id, tx.original_asset, float(tx.original_amount)) == (
+        137,
+        "DAI",
+        250,
+    )
+
+    checkpoints = {source.key: source for source in MonitorSource.query.all()}
+    assert checkpoints[f"1:{safe_a}"].last_block == 108
+    assert checkpoints[f"1:{safe_a}"].head_block == 120
+    assert checkpoints[f"137:{safe_b}"].last_block == 35
+    assert checkpoints[f"137:{safe_b}"].errors_total >= 1
+
+    client = app.test_client()
+    assert client.get("/api/monitor/sources").status_code == 401
+    response = client.get(
+        "/api/monitor/sources", headers={"Authorization": "Bearer testsecrettoken"}
+    )
+    assert response.status_code == 200
+    status = {s["key"]: s for s in response.get_json()["sources"]}
+    assert {key: s["lag_blocks"] for key, s in status.items()} == {
+        f"1:{safe_a}": 12,
+        f"137:{safe_b}": 5,
+    }
+    assert status[f"137:{safe_b}"]["last_error"] is None
+
+    # A restart resumes from the stored checkpoints and picks up new blocks only
+    mainnet.head = 130
+    monitor = Monitor(sources, flush_interval=0.05, poll_interval=0.05)
+    run_until_caught_up(monitor, {f"1:{safe_a}": 118, f"137:{safe_b}": 35})
+    assert Transaction.query.count() == 4
+    assert MonitorSource.query.filter_by(key=f"1:{safe_a}").one().last_block == 118
+
+
+def test_monitor_restarts_dead_worker(app, serve_chain):
+    safe = "0x" + "a" * 40
+    chain = FakeChain(safe, head=100, deposits=[make_deposit(1, 80)])
+    source = Source(1, serve_chain(chain), safe, 1, USDC, max_block_range=10)
+    key = f"1:{safe}"
+    monitor = Monitor(
+        [source], flush_interval=0.05, poll_interval=0.05, backoff_base=0.05
+    )
+    killed = []
+    deadline = time.monotonic() + 30
+
+    def should_stop():
+        if not killed and monitor.stats[key].last_block >= 20:
+            killed.append(monitor.workers[key])
+            killed[0].kill()
+            # Only a restarted worker can reach the new blocks
+            chain.deposits[make_deposit(2, 0)["hash"]] = make_deposit(2, 150)
+            chain.head = 200
+        return time.monotonic() > deadline or monitor.stats[key].last_block >= 188
+
+    monitor.run(should_stop)
+    assert time.monotonic() <= deadline, "monitor did not recover in time"
+    assert monitor.workers[key] is not killed[0]
+
+    assert Transaction.query.count() == 2
+    checkpoint = MonitorSource.query.filter_by(key=key).one()
+    assert checkpoint.last_block == 188
+    assert checkpoint.errors_total >= 1
+
+
+def test_monitor_skips_known_deposits(app, serve_chain):
+    safe = "0x" + "a" * 40
+    deposits = [make_deposit(i, 20 + i) for i in range(1, 4)]
+    chain = FakeChain(safe, head=100, deposits=deposits)
+    row = {
+        "id": 1,
+        "chain_id": 1,
+        "user_address": deposits[0]["from"],
+        "original_asset": "USDC",
+        "original_amount": Decimal(250),
+        "usdc_amount": Decimal(250),
+        "lock_duration_weeks": 24,
+        "transaction_hash": deposits[0]["hash"],
+        "timestamp": datetime(2024, 1, 1),
+    }
+    write_segment(app.config["ARCHIVE_DIR"], [row])
+    db.session.execute(
+        Transaction.__table__.insert(),
+        [dict(row, id=2, transaction_hash=deposits[1]["hash"])],
+    )
+    db.session.commit()
+
+    key = f"1:{safe}"
+    monitor = Monitor(
+        [Source(1, serve_chain(chain), safe, 1, USDC)],
+        flush_interval=0.05,
+        poll_interval=0.05,
+    )
+    run_until_caught_up(monitor, {key: 88})
+
+    # The archived deposit is not re-inserted and only the new one is counted
+    assert sorted(tx.transaction_hash for tx in Transaction.query) == [
+        deposits[1]["hash"],
+        deposits[2]["hash"],
+    ]
+    assert MonitorSource.query.filter_by(key=key).one().deposits_total == 1
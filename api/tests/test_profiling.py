@@ -0,0 +1,129 @@
+# ./api/tests/test_profiling.py
+
+import os
+
+import pytest
+from api.app import create_app, db
+from api.config import TestConfig
+from api.profiling import ProfileStore
+
+
+@pytest.fixture
+def profile_dir(tmp_path):
+    return str(tmp_path / "profiles")
+
+
+def make_app(profile_dir, **overrides):
+    class ProfileConfig(TestConfig):
+        PROFILE_DIR = profile_dir
+        PROFILE_KEYS = ["default"]
+
+    for key, value in overrides.items():
+        setattr(ProfileConfig, key, value)
+    return create_app(ProfileConfig)
+
+
+@pytest.fixture
+def app(profile_dir):
+    app = make_app(profile_dir)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_profile_store_is_bounded(profile_dir):
+    store = ProfileStore(profile_dir, max_reports=3)
+    ids = [store.save({"path": f"/{i}"}) for i in range(5)]
+    assert store.ids() == ids[:1:-1]
+    assert store.load(ids[0]) is None
+    assert store.load(ids[-1])["path"] == "/4"
+    assert store.load("../../etc/passwd") is None
+
+
+def test_not_profiled_by_default(client):
+    response = client.get("/api/transactions", headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+
+
+def test_profile_header_with_key(client):
+    headers = {"X-Profile": "1", "Authorization": "Bearer testsecrettoken"}
+    response = client.get("/api/transactions", headers=headers)
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+
+    headers = {"Authorization": "Bearer testsecrettoken"}
+    response = client.get("/api/profiles", headers=headers)
+    assert response.status_code == 200
+    assert [p["id"] for p in response.get_json()["profiles"]] == [profile_id]
+
+    response = client.get(f"/api/profiles/{profile_id}", headers=headers)
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report["path"] == "/api/transactions"
+    assert report["status"] == 200
+    assert report["query_count"] == len(report["queries"]) > 0
+    assert any("FROM transactions" in q["statement"] for q in report["queries"])
+    assert "cumulative" in report["calls"]
+
+
+def test_profiles_require_token(client):
+    assert client.get("/api/profiles").status_code == 401
+    response = client.get(
+        "/api/profiles/1-1-1", headers={"Authorization": "Bearer testsecrettoken"}
+    )
+    assert response.status_code == 404
+
+
+def test_enabled_keeps_only_slow_requests(profile_dir):
+    app = make_app(profile_dir, PROFILE_ENABLED=True, PROFILE_SLOW_MS=60000)
+    client = app.test_client()
+    assert "X-Profile-Id" not in client.get("/api/transactions").headers
+
+    app.config["PROFILE_SLOW_MS"] = 0
+    response = client.get("/api/transactions")
+    report = app.extensions["profiles"].load(response.headers["X-Profile-Id"])
+    assert report["calls"] is None
+    assert report["query_count"] > 0
+
+
+def test_anonymous_header_ignored_when_enabled(profile_dir):
+    app = make_app(profile_dir, PROFILE_ENABLED=True, PROFILE_SLOW_MS=60000)
+    client = app.test_client()
+    response = client.get("/api/transactions", headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert app.extensions["profiles"].ids() == []
+
+
+def test_profile_store_ignores_foreign_files(profile_dir):
+    store = ProfileStore(profile_dir)
+    report_id = store.save({"path": "/"})
+    with open(os.path.join(profile_dir, "notes.json"), "w") as f:
+        f.write("{}")
+    assert store.ids() == [report_id]
+    assert store.save({"path": "/again"}) in store.ids()
+
+
+def test_listing_profiles_uses_read_bucket(profile_dir):
+    app = make_app(profile_dir, RATE_LIMIT_WRITE_BURST=1, RATE_LIMIT_WRITE_RATE=0.001)
+    client = app.test_client()
+    headers = {"Authorization": "Bearer testsecrettoken"}
+    for _ in range(3):
+        assert client.get("/api/profiles", headers=headers).status_code == 200
+
+
+def test_profile_header_requires_listed_key(client, app):
+    result = app.test_cli_runner().invoke(args=["api-keys", "create", "ingester"])
+    headers = {"X-Profile": "1", "Authorization": f"Bearer {result.output.strip()}"}
+    response = client.get("/api/transactions", headers=headers)
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert app.extensions["profiles"].ids() == []
@@ -0,0 +1,44 @@
+"""initial schema
+
+Revision ID: 3f9c2a1b7d10
+Revises:
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "3f9c2a1b7d10"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Deployments that predate migrations already have this table from
+    # db.create_all()
+    if sa.inspect(op.get_bind()).has_table("transactions"):
+        return
+    op.create_table(
+        "transactions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_address", sa.String(length=42), nullable=False),
+        sa.Column("original_asset", sa.String(length=10), nullable=False),
+        sa.Column("original_amount", sa.Numeric(), nullable=False),
+        sa.Column("usdc_amount", sa.Numeric(), nullable=False),
+        sa.Column("lock_duration_weeks", sa.Integer(), nullable=False),
+        sa.Column("transaction_hash", sa.String(length=66), nullable=False),
+        sa.Column(
+            "timestamp", sa.DateTime(), server_default=sa.func.now(), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("transaction_hash"),
+    )
+    op.create_index("ix_transactions_user_address", "transactions", ["user_address"])
+
+
+def downgrade():
+    op.drop_index("ix_transactions_user_address", table_name="transactions")
+    op.drop_table("transactions")
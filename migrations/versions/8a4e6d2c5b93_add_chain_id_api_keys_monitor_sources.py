@@ -0,0 +1,81 @@
+"""add chain_id, api_keys and monitor_sources
+
+Revision ID: 8a4e6d2c5b93
+Revises: 3f9c2a1b7d10
+Create Date: 2026-10-19 10:05:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "8a4e6d2c5b93"
+down_revision = "3f9c2a1b7d10"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The app runs db.create_all() on startup, which creates the new tables
+    # (but never adds columns), so each step checks what already exists.
+    inspector = sa.inspect(op.get_bind())
+
+    columns = {column["name"] for column in inspector.get_columns("transactions")}
+    if "chain_id" not in columns:
+        # Every deposit before multi-chain ingestion was on Ethereum mainnet
+        op.add_column(
+            "transactions",
+            sa.Column("chain_id", sa.Integer(), server_default="1", nullable=False),
+        )
+    indexes = {index["name"] for index in inspector.get_indexes("transactions")}
+    if "ix_transactions_chain_id" not in indexes:
+        op.create_index("ix_transactions_chain_id", "transactions", ["chain_id"])
+
+    if not inspector.has_table("api_keys"):
+        op.create_table(
+            "api_keys",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=64), nullable=False),
+            sa.Column("key_hash", sa.String(length=64), nullable=False),
+            sa.Column("read_rate", sa.Float(), nullable=True),
+            sa.Column("read_burst", sa.Integer(), nullable=True),
+            sa.Column("write_rate", sa.Float(), nullable=True),
+            sa.Column("write_burst", sa.Integer(), nullable=True),
+            sa.Column(
+                "created_at",
+                sa.DateTime(),
+                server_default=sa.func.now(),
+                nullable=False,
+            ),
+            sa.Column("revoked_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("key_hash"),
+            sa.UniqueConstraint("name"),
+        )
+
+    if not inspector.has_table("monitor_sources"):
+        op.create_table(
+            "monitor_sources",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("key", sa.String(length=64), nullable=False),
+            sa.Column("chain_id", sa.Integer(), nullable=False),
+            sa.Column("safe_address", sa.String(length=42), nullable=False),
+            sa.Column("last_block", sa.BigInteger(), nullable=False),
+            sa.Column("head_block", sa.BigInteger(), nullable=True),
+            sa.Column("deposits_total", sa.BigInteger(), nullable=False),
+            sa.Column("blocks_per_second", sa.Float(), nullable=False),
+            sa.Column("deposits_per_second", sa.Float(), nullable=False),
+            sa.Column("errors_total", sa.BigInteger(), nullable=False),
+            sa.Column("last_error", sa.String(length=255), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("key"),
+        )
+
+
+def downgrade():
+    op.drop_table("monitor_sources")
+    op.drop_table("api_keys")
+    op.drop_index("ix_transactions_chain_id", table_name="transactions")
+    op.drop_column("transactions", "chain_id")
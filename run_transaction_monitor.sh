@@ -3,7 +3,7 @@
 # Set the working directory to /app
 cd /app
 
-# Infinite loop to run the transaction monitor every 5 seconds
+# The monitor runs until stopped; restart it after 5 seconds if it exits
 while true; do
     python scripts/transaction_monitor.py
     sleep 5
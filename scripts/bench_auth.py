@@ -0,0 +1,100 @@
+"""
+Benchmark the per-request cost of API key verification and rate limiting.
+
+Usage:
+    python scripts/bench_auth.py [iterations]
+
+Reports the raw cost of ApiKeyRegistry.verify() and RateLimiter.hit(), and the
+end-to-end overhead of read_token_required: two trivial routes, one plain and
+one behind the decorator, are timed through the Flask test client in
+interleaved rounds and the median difference is reported.
+"""
+
+import statistics
+import sys
+import timeit
+
+from api.app import create_app, db, read_token_required
+from api.auth import RateLimit
+from api.config import TestConfig
+
+ROUNDS = 15
+
+
+class BenchConfig(TestConfig):
+    # Keep the limiter in the path, with limits no run can reach
+    RATE_LIMIT_READ_RATE = 1e9
+    RATE_LIMIT_READ_BURST = 10**9
+
+
+def report(label, seconds, iterations):
+    print(f"{label:<40} {seconds / iterations * 1e6:9.2f} us/op")
+
+
+def run(iterations):
+    app = create_app(BenchConfig)
+
+    @app.route("/bench/plain")
+    def bench_plain():
+        return ""
+
+    @app.route("/bench/auth")
+    @read_token_required
+    def bench_auth():
+        return ""
+
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {BenchConfig.AUTH_TOKEN}"}
+
+    with app.app_context():
+        db.create_all()
+        registry = app.extensions["api_keys"]
+        limiter = app.extensions["rate_limiter"]
+        limit = RateLimit(1e9, 1e9)
+        # Warm the key cache so the loop measures the steady state
+        registry.verify(BenchConfig.AUTH_TOKEN)
+
+        report(
+            "registry.verify (valid key)",
+            timeit.timeit(
+                lambda: registry.verify(BenchConfig.AUTH_TOKEN), number=iterations
+            ),
+            iterations,
+        )
+        report(
+            "registry.verify (unknown key)",
+            timeit.timeit(lambda: registry.verify("not-a-key"), number=iterations),
+            iterations,
+        )
+        report(
+            "limiter.hit",
+            timeit.timeit(
+                lambda: limiter.hit("bench", "write", limit), number=iterations
+            ),
+            iterations,
+        )
+
+    plain, authenticated = [], []
+    requests = max(1, iterations // (10 * ROUNDS))
+    for round_ in range(ROUNDS + 1):
+        # Alternate the order so neither variant always runs first
+        runs = [
+            (plain, lambda: client.get("/bench/plain")),
+            (authenticated, lambda: client.get("/bench/auth", headers=headers)),
+        ]
+        if round_ % 2:
+            runs.reverse()
+        for results, request in runs:
+            seconds = timeit.timeit(request, number=requests) / requests
+            # The first round only warms up both routes
+            if round_:
+                results.append(seconds)
+
+    overhead = [a - p for a, p in zip(authenticated, plain)]
+    report("GET (no key)", statistics.median(plain), 1)
+    report("GET (valid key)", statistics.median(authenticated), 1)
+    report("auth overhead per request", statistics.median(overhead), 1)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
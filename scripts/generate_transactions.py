@@ -0,0 +1,193 @@
+"""
+Generate a synthetic transactions dataset for capacity testing.
+
+Usage:
+    python scripts/generate_transactions.py --rows 10000000 --seed 42
+
+Deposits follow a Zipf distribution over users, a fixed asset mix with
+log-normal deposit sizes, a lock duration histogram, and timestamps spread
+over the months before --end with volume ramping up towards it. The same seed
+and --end always produce the same rows. Rows are written in batches, using
+COPY on PostgreSQL and executemany elsewhere; the database comes from
+DATABASE_URL.
+"""
+
+import argparse
+import csv
+import io
+import itertools
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+from api.app import Transaction, create_app, db
+from api.config import Config
+
+# asset -> (share of deposits, approximate USD price)
+ASSET_MIX = {
+    "ETH": (0.45, 2500.0),
+    "USDC": (0.25, 1.0),
+    "USDT": (0.12, 1.0),
+    "DAI": (0.10, 1.0),
+    "WBTC": (0.08, 60000.0),
+}
+
+# Deposited at par: original_amount equals usdc_amount, as the monitor records
+STABLECOINS = {"USDC", "USDT", "DAI"}
+
+# Spread of the swap price around the reference price for volatile assets
+PRICE_JITTER = 0.1
+
+# lock_duration_weeks -> share of deposits
+LOCK_WEEKS = {4: 0.20, 12: 0.35, 24: 0.20, 52: 0.20, 104: 0.05}
+
+# Deposit size in USD is log-normal: median ~ exp(mu), long right tail
+USD_MU = math.log(500)
+USD_SIGMA = 1.6
+
+COLUMNS = (
+    "user_address",
+    "original_asset",
+    "original_amount",
+    "usdc_amount",
+    "lock_duration_weeks",
+    "transaction_hash",
+    "timestamp",
+)
+
+
+def zipf_cum_weights(n, s):
+    """Cumulative weights for ranks 1..n with P(k) proportional to 1/k**s."""
+    return list(itertools.accumulate(1.0 / k**s for k in range(1, n + 1)))
+
+
+class Generator:
+    def __init__(self, seed, users, zipf_s, months, end=None):
+        self.rng = random.Random(seed)
+        self.users = ["0x%040x" % self.rng.getrandbits(160) for _ in range(users)]
+        self.user_weights = zipf_cum_weights(users, zipf_s)
+        self.assets = list(ASSET_MIX)
+        self.asset_weights = list(
+            itertools.accumulate(share for share, _ in ASSET_MIX.values())
+        )
+        self.prices = [price for _, price in ASSET_MIX.values()]
+        self.jitter = [
+            0.0 if asset in STABLECOINS else PRICE_JITTER for asset in ASSET_MIX
+        ]
+        self.locks = list(LOCK_WEEKS)
+        self.lock_weights = list(itertools.accumulate(LOCK_WEEKS.values()))
+        self.end = end or datetime.utcnow().replace(microsecond=0)
+        self.span = timedelta(days=30 * months).total_seconds()
+        self.start = self.end - timedelta(seconds=self.span)
+
+    def batch(self, size):
+        """Return `size` rows as tuples in COLUMNS order."""
+        rng = self.rng
+        # Each column is drawn in one call so the per-row loop stays small
+        users = rng.choices(self.users, cum_weights=self.user_weights, k=size)
+        assets = rng.choices(
+            range(len(self.assets)), cum_weights=self.asset_weights, k=size
+        )
+        locks = rng.choices(self.locks, cum_weights=self.lock_weights, k=size)
+        lognormal = rng.lognormvariate
+        getrandbits = rng.getrandbits
+        sample = rng.random
+
+        rows = []
+        for user, asset, lock in zip(users, assets, locks):
+            usd = round(lognormal(USD_MU, USD_SIGMA), 6)
+            price = self.prices[asset] * (1 + (sample() - 0.5) * self.jitter[asset])
+            # sqrt of a uniform gives a density that grows linearly over time
+            offset = self.span * math.sqrt(sample())
+            rows.append(
+                (
+                    user,
+                    self.assets[asset],
+                    round(usd / price, 8),
+                    usd,
+                    lock,
+                    "0x%064x" % getrandbits(256),
+                    self.start + timedelta(seconds=int(offset)),
+                )
+            )
+        return rows
+
+
+def insert_copy(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row[:-1] + (row[-1].isoformat(),))
+    buffer.seek(0)
+
+    connection = db.engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {Transaction.__tablename__} ({', '.join(COLUMNS)}) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def insert_many(rows):
+    db.session.execute(
+        Transaction.__table__.insert(), [dict(zip(COLUMNS, row)) for row in rows]
+    )
+    db.session.commit()
+
+
+def generate_transactions(
+    rows, batch_size, seed, users, zipf_s, months, end=None, config_class=Config
+):
+    app = create_app(config_class)
+    with app.app_context():
+        generator = Generator(seed, users, zipf_s, months, end)
+        insert = insert_copy if db.engine.dialect.name == "postgresql" else insert_many
+
+        started = time.monotonic()
+        written = 0
+        while written < rows:
+            batch = generator.batch(min(batch_size, rows - written))
+            insert(batch)
+            written += len(batch)
+            elapsed = time.monotonic() - started
+            print(
+                f"{written}/{rows} rows, {written / elapsed:,.0f} rows/s",
+                flush=True,
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--batch-size", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument(
+        "--zipf", type=float, default=1.1, help="Zipf exponent for user activity."
+    )
+    parser.add_argument(
+        "--months", type=int, default=6, help="Months of history to generate."
+    )
+    parser.add_argument(
+        "--end",
+        type=datetime.fromisoformat,
+        default=None,
+        help="Latest timestamp, ISO format (default: now).",
+    )
+    args = parser.parse_args()
+
+    generate_transactions(
+        args.rows,
+        args.batch_size,
+        args.seed,
+        args.users,
+        args.zipf,
+        args.months,
+        args.end,
+    )
@@ -1,52 +1,51 @@
-import random
-from api.app import create_app, db, Transaction
+import argparse
+import json
+import logging
+import signal
+import threading
 
-from sqlalchemy.exc import IntegrityError
+from api.app import create_app
+from api.monitor import Monitor, load_source
 
 
-def simulate_transactions():
-    # todo: implement ethscanner to parse all transactions.
+def load_sources(path):
+    """
+    Read monitor sources from a JSON list such as:
+    [{"chain_id": 1, "rpc_url": "https://...", "safe_address": "0x...",
+      "start_block": 20000000, "usdc_address": "0x..."}]
+    """
+    with open(path) as f:
+        return [load_source(config) for config in json.load(f)]
+
+
+def run_monitor(sources_path=None):
     app = create_app()
+    sources = load_sources(sources_path or app.config["MONITOR_SOURCES"])
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+
     with app.app_context():
-        # Hardcoded transaction data
-        transactions = [
-            {
-                "user_address": "0xab5801a7d398351b8be11c439e05c5b3259aec9b",
-                "original_asset": "ETH",
-                "original_amount": 1.5,
-                "usdc_amount": 3000,
-                "lock_duration_weeks": 12,
-                "transaction_hash": "0x"
-                + "".join(random.choices("abcdef1234567890", k=64)),
-            },
-            {
-                "user_address": "0x5abfec25f74cd88437631a7731906932776356f9",
-                "original_asset": "DAI",
-                "original_amount": 200,
-                "usdc_amount": 200,
-                "lock_duration_weeks": 24,
-                "transaction_hash": "0x"
-                + "".join(random.choices("abcdef1234567890", k=64)),
-            },
-        ]
-
-        for txn_data in transactions:
-            transaction = Transaction(
-                user_address=txn_data["user_address"],
-                original_asset=txn_data["original_asset"],
-                original_amount=txn_data["original_amount"],
-                usdc_amount=txn_data["usdc_amount"],
-                lock_duration_weeks=txn_data["lock_duration_weeks"],
-                transaction_hash=txn_data["transaction_hash"],
-            )
-            try:
-                db.session.add(transaction)
-                db.session.commit()
-                print(f"Transaction {transaction.transaction_hash} added.")
-            except IntegrityError:
-                db.session.rollback()
-                print(f"Transaction {transaction.transaction_hash} already exists.")
+        monitor = Monitor(
+            sources,
+            batch_size=app.config["MONITOR_BATCH_SIZE"],
+            flush_interval=app.config["MONITOR_FLUSH_INTERVAL"],
+            poll_interval=app.config["MONITOR_POLL_INTERVAL"],
+        )
+        monitor.run(stopping.is_set)
 
 
 if __name__ == "__main__":
-    simulate_transactions()
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    parser = argparse.ArgumentParser(
+        description="Ingest Safe deposits from one or more EVM chains."
+    )
+    parser.add_argument(
+        "--sources", default=None, help="Sources JSON file (default: MONITOR_SOURCES)."
+    )
+    args = parser.parse_args()
+
+    run_monitor(args.sources)